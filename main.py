@@ -1,5 +1,21 @@
 import os
 import random
+import json
+import hashlib
+import struct
+import time
+import socket
+import select
+import selectors
+import multiprocessing
+from collections import OrderedDict, deque
+from multiprocessing import shared_memory
+
+# NumPy is optional; only the batched BCP kernel needs it
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # ==========================================
 # SECTION 1: MOCK INFERENCE ENGINE (SIMULATION)
@@ -33,8 +49,11 @@ def mock_inference_engine_generic():
     current_assignments = {} 
     
     # If Trigger is not 0 (i.e., a decision has been made), start by assigning it
+    # Literals forced by this trigger, in propagation order, with their reason
+    forced_lits = []
     if trigger_lit != 0:
         current_assignments[abs(trigger_lit)] = (trigger_lit > 0)
+        forced_lits.append((trigger_lit, "DECISION"))
 
     # --- UNIT PROPAGATION SIMULATION ---
     changed = True
@@ -90,13 +109,11 @@ def mock_inference_engine_generic():
                 # New forced assignment (Implied)
                 if var not in current_assignments:
                     current_assignments[var] = val
+                    forced_lits.append((unit_lit, f"Clause_{i+1}"))
                     changed = True # Made new assignment, re-enter loop
 
-    # Assumption: Variable count is the largest index in the used clauses
-    max_var = 0
-    for clause in clauses:
-        for lit in clause:
-            max_var = max(max_var, abs(lit))
+    # Assumption: Variable count is the largest index in the used clauses (precomputed once per formula)
+    max_var = formula_index_for(clauses).max_var
 
     # If no conflict and all clauses are satisfied, mark as SAT
     if status != "CONFLICT":
@@ -120,9 +137,10 @@ def mock_inference_engine_generic():
         else:
             status = "CONTINUE"
 
-    # 3. Write Output File
+    # 3. Write Output File (v2: only the literals forced by this trigger)
     log_content = ""
     log_content += "--- STATUS ---\n"
+    log_content += "FORMAT: 2\n"
     log_content += f"STATUS: {status}\n"
     log_content += f"DL: {dl}\n"
     log_content += f"CONFLICT_ID: {conflict_clause}\n\n"
@@ -134,15 +152,9 @@ def mock_inference_engine_generic():
         log_content += f"[DL{dl}] INITIAL CHECK\n"
     log_content += f"[DL{dl}] PROPAGATION...\n\n"
 
-    log_content += "--- CURRENT VARIABLE STATE ---\n"
-    # Write found assignments (unassigned ones marked as UNASSIGNED)
-    for var in range(1, max_var + 1):
-        if var in current_assignments:
-            v = current_assignments[var]
-            state = "TRUE" if v else "FALSE"
-        else:
-            state = "UNASSIGNED"
-        log_content += f"{var} | {state}\n"
+    log_content += "--- FORCED LITERALS ---\n"
+    for lit, reason in forced_lits:
+        log_content += f"{lit} | {reason}\n"
 
     with open("bcp_output.txt", "w") as f:
         f.write(log_content)
@@ -152,49 +164,138 @@ def mock_inference_engine_generic():
 # SECTION 2: DPLL SOLVER CLASS
 # ==========================================
 class DPLLSearchEngine:
-    def __init__(self, cnf_clauses, num_vars, inference_cmd="inference_engine.exe"):
+    def __init__(self, cnf_clauses, num_vars, inference_cmd="inference_engine.exe", proof=None,
+                 decision_mode="jw", lookahead_k=8, engine=None, index=None,
+                 checkpoint_path=None, checkpoint_interval=60.0):
         self.clauses = cnf_clauses
         self.num_vars = num_vars
+        # Per-formula data (variables, JW weights, occurrence lists), built once
+        self.index = index if index is not None else FormulaIndex(cnf_clauses, num_vars)
         self.assignments = {} 
         self.master_trace = [] 
         self.last_conflict_id = None
         self.inference_command = inference_cmd
+        # Optional in-process engine (e.g. InProcessBCPEngine) used instead of the trigger/output files
+        self.engine = engine
+        self.stats = {"decisions": 0, "propagations": 0, "conflicts": 0,
+                      "probes": 0, "failed_literals": 0, "probe_reuses": 0}
+
+        # Branching: "jw" (Jeroslow-Wang) or "lookahead" (failed-literal probing of the top-k JW candidates)
+        self.decision_mode = decision_mode
+        self.lookahead_k = lookahead_k
+        self.binary_implications = {}  # literal -> literals it implies (learned while probing at DL 0)
+        self.phases = {}  # variable -> polarity tried first (seeded by local search)
+
+        # Decision stack of the running search and periodic checkpoints of it
+        self.decision_stack = []
+        self.resume_frames = []
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.next_checkpoint_time = time.monotonic() + checkpoint_interval
+        self.last_trigger = None
+
+        # Called with (trigger literal, result) after every conflict, e.g. to extract unsat cores
+        self.conflict_listener = None
+
+        # Distributed search (see SECTION 14): called before each decision. After a branch is
+        # donated, nodes at or above that depth no longer refute their whole subtree.
+        self.decision_hook = None
+        self.assumptions = []
+        self.donated_depth = None
+
+        # Optional DRAT proof writer (see DratProofWriter) and the current decision path. With a
+        # proof, the negated path is also kept DRAT-encoded, grown on push and truncated on pop,
+        # so that every lemma is a single buffer append.
+        self.proof = proof
+        self.decision_path = []
+        self.encoded_path = bytearray()
+        self.encoded_path_ends = []
         
         self.FILE_TRIGGER = "bcp_trigger_input.txt"
         self.FILE_BCP_OUT = "bcp_output.txt"
         self.FILE_MASTER_TRACE = "master_trace.txt"
 
-    def get_unassigned_vars(self):
-        all_vars = set(range(1, self.num_vars + 1))
-        assigned_vars = set(self.assignments.keys())
-        return list(all_vars - assigned_vars)
+    def satisfies_engine_constraints(self, model):
+        """
+        Checks a model against the native cardinality and XOR constraints of the in-process
+        engine, which local search does not see: it only walks the CNF.
+        """
+        constraints = list(getattr(self.engine, "cards", ())) + list(getattr(self.engine, "xors", ()))
+        return all(constraint.is_satisfied(model) for constraint in constraints)
 
-    def is_clause_satisfied(self, clause):
-        for lit in clause:
-            var = abs(lit)
-            if var in self.assignments:
-                val = self.assignments[var]
-                if (lit > 0 and val) or (lit < 0 and not val):
-                    return True
-        return False
+    def next_unassigned(self, cursor):
+        """
+        Position of the first unassigned variable in the static JW order at or after cursor
+        (len(jw_order) when every variable is assigned). Variables before a node's cursor stay
+        assigned in its whole subtree, so every node resumes the scan of its parent.
+        """
+        order = self.index.jw_order
+        assignments = self.assignments
+        while cursor < len(order) and order[cursor] in assignments:
+            cursor += 1
+        return cursor
 
-    def heuristic_jw(self, unassigned_vars):
-        """Jeroslow-Wang Heuristic"""
-        scores = {var: 0.0 for var in unassigned_vars}
-        active_clauses = [c for c in self.clauses if not self.is_clause_satisfied(c)]
-        
-        if not active_clauses:
-            return unassigned_vars[0] if unassigned_vars else None
+    def heuristic_jw(self, cursor):
+        """Jeroslow-Wang Heuristic: the unassigned variable with the largest static JW weight."""
+        return self.index.jw_order[cursor]
 
-        for clause in active_clauses:
-            length = len(clause)
-            weight = 2.0 ** (-length)
-            for lit in clause:
-                var = abs(lit)
-                if var in scores:
-                    scores[var] += weight
-        
-        return max(scores, key=scores.get)
+    def heuristic_lookahead(self, cursor, dl):
+        """
+        Lookahead branching: probes both polarities of the top-k JW candidates through the
+        inference engine and picks the variable with the largest product of reductions.
+        A failed literal ends probing at once: its variable is returned, so the search
+        rejects the failed polarity from the cache and asserts the other one.
+        Returns (variable, probe results keyed by literal).
+        """
+        order = self.index.jw_order
+        candidates = []
+        while cursor < len(order) and len(candidates) < self.lookahead_k:
+            if order[cursor] not in self.assignments:
+                candidates.append(order[cursor])
+            cursor += 1
+        probes = {}
+        best_var, best_score = None, -1
+
+        for var in candidates:
+            reductions = []
+            for lit in (var, -var):
+                # A literal implying a literal that is already false fails without a probe
+                implied = self.binary_implications.get(lit, ())
+                false_implied = next((m for m in implied if self.assignments.get(abs(m)) == (m < 0)), None)
+                if false_implied is not None:
+                    res = {"status": "CONFLICT", "assignments": {}, "log": "", "dl": dl + 1,
+                           "conflict_id": None, "format": 2, "forced": [(lit, "DECISION")],
+                           "conflict_clause": [-lit, false_implied]}
+                    self.note_conflict(lit, res)
+                else:
+                    res = self.propagate(lit, dl + 1)
+                    self.stats["probes"] += 1
+                probes[lit] = res
+
+                if res["status"] == "SAT":
+                    return var, probes
+                if res["status"] in ("CONFLICT", "UNSAT"):
+                    self.stats["failed_literals"] += 1
+                    return var, probes
+
+                forced = [v if val else -v for v, val in res["assignments"].items()
+                          if v != var and v not in self.assignments]
+                if dl == 0:
+                    # Without earlier decisions the implication holds globally
+                    self.binary_implications.setdefault(lit, set()).update(forced)
+                reductions.append(len(forced))
+
+            score = 1024 * reductions[0] * reductions[1] + reductions[0] + reductions[1]
+            if score > best_score:
+                best_var, best_score = var, score
+
+        return best_var, probes
+
+    def choose_branch_variable(self, cursor, dl):
+        """Returns the branch variable and any probe results already computed for it."""
+        if self.decision_mode == "lookahead":
+            return self.heuristic_lookahead(cursor, dl)
+        return self.heuristic_jw(cursor), {}
 
     def write_trigger_input(self, literal, dl):
         """Creates the trigger file."""
@@ -207,11 +308,18 @@ class DPLLSearchEngine:
             f.write(f"DL: {dl}\n")
 
     def read_bcp_output(self):
-        """Reads and parses the output file."""
+        """
+        Reads and parses the output file.
+        Format 1 reports the full variable state; format 2 ('FORMAT: 2') only the literals
+        forced by this trigger, in propagation order, each with its reason clause ID.
+        In both cases 'assignments' holds what the engine reported.
+        """
         if not os.path.exists(self.FILE_BCP_OUT):
-            return {"status": "ERROR", "assignments": {}, "log": "File not found", "dl": None, "conflict_id": None}
+            return {"status": "ERROR", "assignments": {}, "log": "File not found", "dl": None, "conflict_id": None,
+                    "format": None, "forced": []}
 
-        result = { "status": None, "assignments": {}, "log": "", "dl": None, "conflict_id": None }
+        result = { "status": None, "assignments": {}, "log": "", "dl": None, "conflict_id": None,
+                   "format": 1, "forced": [] }
         
         with open(self.FILE_BCP_OUT, "r") as f:
             lines = f.readlines()
@@ -234,9 +342,14 @@ class DPLLSearchEngine:
             elif line.startswith("--- CURRENT VARIABLE STATE ---"):
                 section = "VARS"
                 continue
+            elif line.startswith("--- FORCED LITERALS ---"):
+                section = "FORCED"
+                continue
 
             if section == "STATUS":
-                if line.startswith("STATUS:"):
+                if line.startswith("FORMAT:"):
+                    result["format"] = int(line.split(":", 1)[1].strip())
+                elif line.startswith("STATUS:"):
                     result["status"] = line.split(":", 1)[1].strip()
                 elif line.startswith("DL:"):
                     dl_str = line.split(":", 1)[1].strip()
@@ -260,101 +373,264 @@ class DPLLSearchEngine:
                         elif state_part == "FALSE":
                             result["assignments"][var] = False
                         # Don't add assignment for UNASSIGNED state
+
+            elif section == "FORCED":
+                # Format: "<literal> | <reason>" (reason is DECISION or a clause ID)
+                if "|" in line:
+                    lit_part, reason = line.split("|", 1)
+                    lit = int(lit_part)
+                    result["forced"].append((lit, reason.strip()))
+                    result["assignments"][abs(lit)] = lit > 0
         return result
 
     def execute_inference_engine(self):
         # Normally calls os.system. Will be overridden with mock.
         os.system(self.inference_command)
 
-    def solve(self):
-        """Main Solving Function"""
-        # STEP 0: Initial Propagation (check before making decisions)
-        print("DL: 0 Starting Initial Propagation...")
-        self.write_trigger_input(literal=0, dl=0)
-        self.execute_inference_engine()
-        
-        bcp_res = self.read_bcp_output()
+    def propagate(self, literal, dl):
+        """Runs one trigger through the inference engine and records the result."""
+        if self.engine is not None:
+            bcp_res = self.engine.run(literal, dl)
+        else:
+            self.write_trigger_input(literal, dl)
+            self.execute_inference_engine()
+            bcp_res = self.read_bcp_output()
         self.last_conflict_id = bcp_res.get("conflict_id")
         self.master_trace.append(bcp_res["log"])
+
+        self.stats["propagations"] += 1
+        if bcp_res["status"] in ("CONFLICT", "UNSAT"):
+            self.note_conflict(literal, bcp_res)
+        self.last_trigger = (literal, dl)
+        return bcp_res
+
+    def note_conflict(self, literal, bcp_res):
+        """Counts a conflict and reports it to the conflict listener, whether or not the engine ran."""
+        self.stats["conflicts"] += 1
+        if self.conflict_listener is not None:
+            self.conflict_listener(literal, bcp_res)
+
+    def propagate_decision(self, literal, dl, probes):
+        """
+        Like propagate, but reuses a lookahead probe result for the same literal.
+        Failed and SAT probes are always reusable; a CONTINUE probe only while it is
+        still the engine's current state (the last trigger sent).
+        """
+        cached = probes.get(literal)
+        if cached is not None:
+            if cached["status"] in ("CONFLICT", "UNSAT", "SAT") or self.last_trigger == (literal, dl):
+                self.stats["probe_reuses"] += 1
+                self.last_conflict_id = cached.get("conflict_id")
+                return cached
+        return self.propagate(literal, dl)
+
+    def apply_assignments(self, assignments):
+        """Merges a propagation result into self.assignments; returns the undo list (variable, old value)."""
+        current = self.assignments
+        undo = [(var, current.get(var)) for var, val in assignments.items() if current.get(var) != val]
+        for var, _ in undo:
+            current[var] = assignments[var]
+        return undo
+
+    def undo_assignments(self, undo):
+        """Reverts apply_assignments: O(number of literals the branch forced), not O(num_vars)."""
+        current = self.assignments
+        for var, previous in reversed(undo):
+            if previous is None:
+                del current[var]
+            else:
+                current[var] = previous
+
+    def record_refutation(self, literal=None):
+        """Adds the lemma 'NOT (decision path AND literal)' to the DRAT proof."""
+        if literal is None and self.donated_depth is not None and len(self.decision_path) <= self.donated_depth:
+            return  # part of this subtree was donated, so the lemma is not implied
+        if self.proof is None:
+            return
+        if literal is None:
+            self.proof.add_encoded(self.encoded_path)
+        else:
+            self.proof.add_encoded(self.encoded_path, self.proof.literal(-literal))
+
+    def push_decision(self, lit):
+        self.decision_path.append(lit)
+        if self.proof is not None:
+            self.encoded_path_ends.append(len(self.encoded_path))
+            self.encoded_path += self.proof.literal(-lit)
+
+    def pop_decision(self):
+        self.decision_path.pop()
+        if self.proof is not None:
+            del self.encoded_path[self.encoded_path_ends.pop():]
+
+    def donate_branch(self):
+        """
+        Gives away the untried branch of the shallowest open decision.
+        Returns its guiding path (assumptions, decisions above it, donated literal) or None.
+        """
+        for depth, frame in enumerate(self.decision_stack):
+            if frame[2] < len(frame[1]) - 1:
+                donated = frame[1].pop()
+                path = list(self.assumptions) + [f[1][f[2]] for f in self.decision_stack[:depth]] + [donated]
+                path_depth = len(self.assumptions) + depth
+                if self.donated_depth is None or path_depth > self.donated_depth:
+                    self.donated_depth = path_depth
+                return path
+        return None
+
+    def solve(self, mode="dpll", seed=None, max_flips=100000, time_budget=None, assumptions=()):
+        """
+        Main Solving Function
+        mode: "dpll" (systematic search), "local_search" (LocalSearchSolver only, UNKNOWN if it
+        gives up) or "hybrid" (local search first; its best assignment seeds the DPLL phases).
+        A local search model that breaks an engine-side constraint is not reported as SAT.
+        assumptions: literals decided at DL 1, 2, ... before the search (a guiding path);
+        UNSAT then only means that no model extends them.
+        """
+        if mode in ("local_search", "hybrid"):
+            ls_result = LocalSearchSolver(self.clauses, self.num_vars, seed=seed, index=self.index).run(
+                max_flips=max_flips, time_budget=time_budget)
+            self.stats["flips"] = ls_result["flips"]
+            if ls_result["status"] == "SAT" and self.satisfies_engine_constraints(ls_result["model"]):
+                self.assignments = ls_result["model"]
+                return self.finalize("SAT")
+            if mode == "local_search":
+                return self.finalize("UNKNOWN")
+            self.phases = ls_result["model"]
+
+        # STEP 0: Initial Propagation (check before making decisions)
+        print("DL: 0 Starting Initial Propagation...")
+        bcp_res = self.propagate(literal=0, dl=0)
         self.assignments.update(bcp_res["assignments"])
 
         status = bcp_res.get("status")
 
         # STATUS interpretation
         if status in ("CONFLICT", "UNSAT"):
+            self.record_refutation()
             return self.finalize("UNSAT")
-        if status == "SAT":
-            return self.finalize("SAT")
-        
-        if not self.get_unassigned_vars():
+
+        # Guiding path: each assumption is a decision without the alternative branch
+        self.assumptions = list(assumptions)
+        for dl, lit in enumerate(self.assumptions, start=1):
+            bcp_res = self.propagate(lit, dl)
+            status = bcp_res["status"]
+            if status in ("CONFLICT", "UNSAT"):
+                self.record_refutation(lit)
+                return self.finalize("UNSAT")
+            self.assignments.update(bcp_res["assignments"])
+            self.assignments[abs(lit)] = lit > 0
+            self.push_decision(lit)
+
+        # Only once every assumption has been checked can propagation settle the formula
+        if status == "SAT" or self.next_unassigned(0) == len(self.index.jw_order):
             return self.finalize("SAT")
 
         # Start recursive search (from DL 1)
-        final_status = self.dpll_recursive(dl=0) 
+        final_status = self.dpll_recursive(dl=len(self.assumptions))
         return self.finalize(final_status)
 
-    def dpll_recursive(self, dl):
-        unassigned = self.get_unassigned_vars()
-        if not unassigned:
-            return "SAT"
+    def dpll_recursive(self, dl, cursor=0):
+        if self.resume_frames:
+            # Resuming from a checkpoint: replay the recorded decision instead of choosing one
+            var, branches, branch_index = self.resume_frames.pop(0)
+            probes = {}
+        else:
+            cursor = self.next_unassigned(cursor)
+            if cursor == len(self.index.jw_order):
+                return "SAT"
+            self.maybe_checkpoint()
+            if self.decision_hook is not None:
+                self.decision_hook(self)
+
+            # 1. Decision (Guess)
+            var, probes = self.choose_branch_variable(cursor, dl)
+            self.stats["decisions"] += 1
 
-        # 1. Decision (Guess)
-        var = self.heuristic_jw(unassigned)
+            # Branch on the preferred polarity first (TRUE unless a phase was seeded), then backtrack
+            first_lit = var if self.phases.get(var, True) else -var
+            branches, branch_index = [first_lit, -first_lit], 0
         next_dl = dl + 1
 
-        # --- BRANCH 1: TRUE ---
-        saved_assignments = self.assignments.copy()
-        
-        self.write_trigger_input(var, next_dl)
-        self.execute_inference_engine()
-        
-        bcp_res = self.read_bcp_output()
-        self.last_conflict_id = bcp_res.get("conflict_id")
-        self.master_trace.append(bcp_res["log"])
-        
-        status = bcp_res["status"]
-        
-        if status == "SAT":
-            self.assignments.update(bcp_res["assignments"])
-            return "SAT"
-        
-        if status not in ("CONFLICT", "UNSAT"):
-            self.assignments.update(bcp_res["assignments"])
-            self.assignments[var] = True
-            
-            if self.dpll_recursive(next_dl) == "SAT":
-                return "SAT"
-        
-        # --- BRANCH 2: FALSE (Backtracking) ---
-        self.assignments = saved_assignments # Restore state
-        
-        # Trigger: Try the negative
-        self.write_trigger_input(-var, next_dl)
-        self.execute_inference_engine()
-        
-        bcp_res = self.read_bcp_output()
-        self.last_conflict_id = bcp_res.get("conflict_id")
-        self.master_trace.append(bcp_res["log"])
-        
-        status = bcp_res["status"]
-        
-        if status == "SAT":
-            self.assignments.update(bcp_res["assignments"])
-            return "SAT"
-        
-        if status not in ("CONFLICT", "UNSAT"):
-            self.assignments.update(bcp_res["assignments"])
-            self.assignments[var] = False
-            
-            if self.dpll_recursive(next_dl) == "SAT":
+        frame = [var, branches, branch_index]  # decision stack entry: variable, branch literals, current branch
+        self.decision_stack.append(frame)
+
+        while frame[2] < len(frame[1]):
+            lit = frame[1][frame[2]]
+            bcp_res = self.propagate_decision(lit, next_dl, probes)
+            status = bcp_res["status"]
+
+            if status == "SAT":
+                self.assignments.update(bcp_res["assignments"])
                 return "SAT"
 
-        # Both branches failed
-        self.assignments = saved_assignments
+            if status in ("CONFLICT", "UNSAT"):
+                self.record_refutation(lit)
+            else:
+                # Only the literals this branch forced are recorded, and undone before the next branch
+                undo = self.apply_assignments(bcp_res["assignments"])
+                undo += self.apply_assignments({var: lit > 0})
+
+                self.push_decision(lit)
+                child_status = self.dpll_recursive(next_dl, cursor)
+                self.pop_decision()
+                if child_status == "SAT":
+                    return "SAT"
+                self.undo_assignments(undo)
+
+            frame[2] += 1
+        self.decision_stack.pop()
+
+        # Both branches failed: both branch lemmas resolve into 'NOT (decision path)'
+        self.record_refutation()
+        if self.proof is not None and self.decision_path:
+            self.proof.delete_encoded(self.encoded_path, self.proof.literal(-var))
+            self.proof.delete_encoded(self.encoded_path, self.proof.literal(var))
         return "UNSAT"
 
+    def maybe_checkpoint(self):
+        """Writes a checkpoint when the interval has elapsed (one clock read per decision)."""
+        if self.checkpoint_path is None or time.monotonic() < self.next_checkpoint_time:
+            return
+        self.write_checkpoint(self.checkpoint_path)
+        self.next_checkpoint_time = time.monotonic() + self.checkpoint_interval
+
+    def write_checkpoint(self, path):
+        """Writes the assumptions, decision stack, learned implications, phases and statistics (see CHECKPOINT_FORMAT)."""
+        self.stats["checkpoints"] = self.stats.get("checkpoints", 0) + 1
+        snapshot = {
+            "formula_key": formula_cache_key(self.clauses, self.num_vars),
+            "assumptions": self.assumptions,
+            "stats": self.stats,
+            "frames": [(var, branches, index) for var, branches, index in self.decision_stack],
+            "phases": self.phases,
+            "implications": self.binary_implications,
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(encode_checkpoint(snapshot))
+        os.replace(tmp_path, path)
+
+    def resume(self, path):
+        """
+        Continues the search saved in a checkpoint: the assumptions of the interrupted solve() are
+        applied again, the recorded decisions are replayed through the inference engine and every
+        branch already refuted before the checkpoint is skipped.
+        """
+        snapshot = read_checkpoint(path)
+        if snapshot["formula_key"] != formula_cache_key(self.clauses, self.num_vars):
+            raise ValueError(f"Checkpoint '{path}' was written for a different formula")
+
+        self.stats.update(snapshot["stats"])
+        self.phases = snapshot["phases"]
+        self.binary_implications = snapshot["implications"]
+        self.resume_frames = snapshot["frames"]
+        return self.solve(assumptions=snapshot["assumptions"])
+
     def finalize(self, status):
         print(f"Final Status: {status}")
+        if self.proof is not None:
+            self.proof.flush()
         with open(self.FILE_MASTER_TRACE, "w") as f:
             # Concatenate trace logs with separator
             f.write("\n-------------------------------------------------\n".join(self.master_trace))
@@ -363,10 +639,2380 @@ class DPLLSearchEngine:
             "model": self.assignments.copy() if status == "SAT" else None,
             "trace_file": self.FILE_MASTER_TRACE,
             "final_conflict_id": self.last_conflict_id,
+            "stats": dict(self.stats),
         }
         return result
 
 
+# ==========================================
+# SECTION 3: RESULT CACHE
+# ==========================================
+def formula_cache_key(cnf_clauses, num_vars, options=None):
+    """
+    Canonical hash of a formula plus the solver options.
+    Literal order inside a clause, clause order and duplicate clauses do not change the key.
+    """
+    canonical = sorted(set(tuple(sorted(set(clause))) for clause in cnf_clauses))
+    digest = hashlib.sha256()
+    digest.update(f"vars={num_vars};".encode())
+    for clause in canonical:
+        digest.update(",".join(map(str, clause)).encode())
+        digest.update(b";")
+    digest.update(b"|")
+    for name in sorted(options or {}):
+        digest.update(f"{name}={options[name]!r};".encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier result cache: an in-memory LRU in front of an optional on-disk directory.
+    Entries hold the status, model and statistics of a finished solve.
+    """
+    def __init__(self, capacity=128, cache_dir=None):
+        self.capacity = capacity
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def get(self, key):
+        """Returns a copy of the cached result, or None on a miss."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        elif self.cache_dir is not None and os.path.exists(self._disk_path(key)):
+            with open(self._disk_path(key), "r") as f:
+                stored = json.load(f)
+            # JSON turns the integer variable ids into strings
+            if stored["model"] is not None:
+                stored["model"] = {int(var): val for var, val in stored["model"].items()}
+            entry = stored
+            self._remember(key, entry)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        result = dict(entry)
+        result["model"] = dict(entry["model"]) if entry["model"] is not None else None
+        result["stats"] = dict(entry["stats"])
+        return result
+
+    def put(self, key, result):
+        """Stores the status, model and statistics of a solver result."""
+        entry = {
+            "status": result["status"],
+            "model": dict(result["model"]) if result.get("model") is not None else None,
+            "trace_file": result.get("trace_file"),
+            "final_conflict_id": result.get("final_conflict_id"),
+            "stats": dict(result.get("stats", {})),
+        }
+        self._remember(key, entry)
+
+        if self.cache_dir is not None:
+            tmp_path = self._disk_path(key) + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._disk_path(key))
+
+
+def engine_cache_signature(engine):
+    """
+    Cache-key form of an in-process engine: its type plus a digest of everything it propagates
+    (clauses, cardinality constraints and XOR rows), since those and not only the CNF handed
+    to the solver decide the answer.
+    """
+    digest = hashlib.sha256()
+    clauses = getattr(engine, "clauses", None)
+    if clauses is not None:
+        digest.update(formula_cache_key(clauses, getattr(engine, "num_vars", 0)).encode())
+    cards = sorted((sorted(card.literals), card.bound) for card in getattr(engine, "cards", ()))
+    xors = sorted((xor.variables, xor.parity) for xor in getattr(engine, "xors", ()))
+    digest.update(repr((cards, xors)).encode())
+    return f"{type(engine).__name__}:{digest.hexdigest()}"
+
+
+def solve_with_cache(cache, cnf_clauses, num_vars, engine_hook=None, **solver_options):
+    """
+    Answers from the cache when the same formula was solved before with the same options.
+    Only on a miss is a DPLLSearchEngine built; engine_hook replaces its execute_inference_engine.
+    A run with a proof writer always solves (a cached answer would leave the proof empty),
+    but its result is still stored for later runs without one.
+    """
+    # The engine matters through its type and constraints, not its identity; the proof not at all
+    key_options = dict(solver_options)
+    key_options.pop("proof", None)
+    if key_options.get("engine") is not None:
+        key_options["engine"] = engine_cache_signature(key_options["engine"])
+    key = formula_cache_key(cnf_clauses, num_vars, key_options)
+    if solver_options.get("proof") is None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    solver = DPLLSearchEngine(cnf_clauses, num_vars, **solver_options)
+    if engine_hook is not None:
+        solver.execute_inference_engine = engine_hook
+    result = solver.solve()
+    cache.put(key, result)
+    return result
+
+
+# ==========================================
+# SECTION 4: DRAT PROOF OUTPUT AND CHECKING
+# ==========================================
+def encode_drat_literal(lit):
+    """Binary DRAT literal encoding: 2*var (+1 if negative) as a 7-bit varint."""
+    value = 2 * abs(lit) + (1 if lit < 0 else 0)
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+class DratProofWriter:
+    """
+    Streams clause additions and deletions in binary DRAT format.
+    Literal encodings are cached and lines are collected in a byte buffer,
+    so the search loop never formats strings or hits the disk per lemma.
+    """
+    def __init__(self, path, buffer_size=1 << 16):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.file = open(path, "wb")
+        self.buffer = bytearray()
+        self.literal_cache = {}
+        self.added = 0
+        self.deleted = 0
+
+    def literal(self, lit):
+        """Cached binary encoding of one literal."""
+        encoded = self.literal_cache.get(lit)
+        if encoded is None:
+            encoded = self.literal_cache[lit] = encode_drat_literal(lit)
+        return encoded
+
+    def _append(self, tag, clause):
+        buf = self.buffer
+        cache = self.literal_cache
+        buf += tag
+        for lit in clause:
+            encoded = cache.get(lit)
+            if encoded is None:
+                encoded = cache[lit] = encode_drat_literal(lit)
+            buf += encoded
+        buf += b"\x00"
+        if len(buf) >= self.buffer_size:
+            self.file.write(buf)
+            buf.clear()
+
+    def _append_encoded(self, tag, prefix, last):
+        buf = self.buffer
+        buf += tag
+        buf += prefix
+        buf += last
+        buf += b"\x00"
+        if len(buf) >= self.buffer_size:
+            self.file.write(buf)
+            buf.clear()
+
+    def add(self, clause):
+        self.added += 1
+        self._append(b"a", clause)
+
+    def delete(self, clause):
+        self.deleted += 1
+        self._append(b"d", clause)
+
+    def add_encoded(self, prefix, last=b""):
+        """Adds a clause given as already encoded literals (e.g. a cached negated decision path)."""
+        self.added += 1
+        self._append_encoded(b"a", prefix, last)
+
+    def delete_encoded(self, prefix, last=b""):
+        self.deleted += 1
+        self._append_encoded(b"d", prefix, last)
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_drat_proof(path):
+    """Parses a binary DRAT file into a list of ('a' | 'd', clause) steps."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    steps = []
+    pos = 0
+    while pos < len(data):
+        tag = chr(data[pos])
+        if tag not in ("a", "d"):
+            raise ValueError(f"Invalid DRAT step marker at byte {pos}")
+        pos += 1
+        clause = []
+        while True:
+            value = 0
+            shift = 0
+            while True:
+                byte = data[pos]
+                pos += 1
+                value |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            if value == 0:
+                break
+            var = value >> 1
+            clause.append(-var if value & 1 else var)
+        steps.append((tag, clause))
+    return steps
+
+
+def _unit_propagate_for_check(assumed, clause_ids, clause_store):
+    """
+    Naive unit propagation used by the proof checker.
+    Returns the set of clause ids involved in the conflict, or None if there is no conflict.
+    """
+    values = {}
+    reasons = {}
+    for lit in assumed:
+        if values.get(abs(lit)) == (lit < 0):
+            return set()
+        values[abs(lit)] = (lit > 0)
+
+    def involved(clause_id):
+        used = set()
+        stack = [clause_id]
+        while stack:
+            cid = stack.pop()
+            if cid in used:
+                continue
+            used.add(cid)
+            for lit in clause_store[cid]:
+                reason = reasons.get(abs(lit))
+                if reason is not None:
+                    stack.append(reason)
+        return used
+
+    changed = True
+    while changed:
+        changed = False
+        for cid in clause_ids:
+            unassigned = None
+            open_count = 0
+            satisfied = False
+            for lit in clause_store[cid]:
+                val = values.get(abs(lit))
+                if val is None:
+                    open_count += 1
+                    unassigned = lit
+                elif val == (lit > 0):
+                    satisfied = True
+                    break
+            if satisfied or open_count > 1:
+                continue
+            if open_count == 0:
+                return involved(cid)
+            values[abs(unassigned)] = (unassigned > 0)
+            reasons[abs(unassigned)] = cid
+            changed = True
+    return None
+
+
+def _check_lemma(lemma, clause_ids, clause_store):
+    """RUP check with a RAT fallback on the first literal. Returns the used clause ids or None."""
+    used = _unit_propagate_for_check([-lit for lit in lemma], clause_ids, clause_store)
+    if used is not None or not lemma:
+        return used
+
+    pivot = lemma[0]
+    used = set()
+    for cid in clause_ids:
+        if -pivot not in clause_store[cid]:
+            continue
+        resolvent = lemma + [lit for lit in clause_store[cid] if lit != -pivot]
+        rup = _unit_propagate_for_check([-lit for lit in resolvent], clause_ids, clause_store)
+        if rup is None:
+            return None
+        used |= rup | {cid}
+    return used
+
+
+def check_drat_proof(cnf_clauses, proof_steps, mode="backward"):
+    """
+    Small built-in DRAT checker, meant for verifying small proofs locally.
+    'forward' checks every added lemma, 'backward' only the lemmas the empty clause depends on.
+    Returns True if the proof derives the empty clause.
+    """
+    clause_store = [list(clause) for clause in cnf_clauses]
+    active = {cid: None for cid in range(len(clause_store))}  # ordered set of live clause ids
+    snapshots = []  # (lemma id, live clause ids when it was added)
+
+    for tag, clause in proof_steps:
+        key = sorted(clause)
+        if tag == "d":
+            for cid in reversed(list(active)):
+                if sorted(clause_store[cid]) == key:
+                    del active[cid]
+                    break
+            continue
+
+        live = list(active)
+        if mode == "forward" and _check_lemma(clause, live, clause_store) is None:
+            return False
+        clause_store.append(list(clause))
+        snapshots.append((len(clause_store) - 1, live))
+        active[len(clause_store) - 1] = None
+        if not clause:
+            break
+    else:
+        return False  # the proof never derives the empty clause
+
+    if mode == "forward":
+        return True
+
+    # Backward pass: verify lemmas in reverse, only when something already verified used them
+    marked = {snapshots[-1][0]}
+    for lemma_id, live in reversed(snapshots):
+        if lemma_id not in marked:
+            continue
+        used = _check_lemma(clause_store[lemma_id], live, clause_store)
+        if used is None:
+            return False
+        marked |= used
+    return True
+
+
+# ==========================================
+# SECTION 5: VECTORIZED BATCH BCP (NUMPY)
+# ==========================================
+class ClauseMatrix:
+    """
+    Array-backed clause database: clauses padded with 0 into a (num_clauses x max_len) matrix.
+    Built once per formula and shared by every batch_propagate call. Pass the declared num_vars
+    when triggers may use variables that no clause mentions.
+    """
+    def __init__(self, cnf_clauses, num_vars=None, index=None):
+        if np is None:
+            raise RuntimeError("ClauseMatrix requires NumPy (pip install numpy)")
+
+        index = index if index is not None else FormulaIndex(cnf_clauses, num_vars)
+        width = max(index.clause_lengths, default=1) or 1
+        self.literals = np.zeros((len(cnf_clauses), width), dtype=np.int64)
+        for i, clause in enumerate(cnf_clauses):
+            self.literals[i, :len(clause)] = clause
+
+        self.variables = np.abs(self.literals)
+        self.signs = np.sign(self.literals).astype(np.int8)
+        self.mask = self.literals != 0
+        self.num_vars = index.num_vars
+
+
+def batch_propagate(matrix, trigger_literals, base_assignments=None, dl=0):
+    """
+    Unit-propagates K candidate trigger literals against the same clause set in one batched call.
+    Row k of the state holds the assignment of candidate k as -1 / 0 / +1 per variable.
+    Returns one dict per candidate, shaped like a format 2 result of DPLLSearchEngine.read_bcp_output:
+    'forced' lists the trigger and every literal it forced on top of base_assignments in
+    propagation order (by round, then by reason clause), each with its reason clause ID, and
+    'assignments' holds the same literals.
+    """
+    base_assignments = base_assignments or {}
+    outside = [v for v in [abs(lit) for lit in trigger_literals] + list(base_assignments) if v > matrix.num_vars]
+    if outside:
+        raise ValueError(f"Variable {max(outside)} is outside the ClauseMatrix ({matrix.num_vars} variables); "
+                         "build it with the declared num_vars")
+
+    k = len(trigger_literals)
+    base = np.zeros(matrix.num_vars + 1, dtype=np.int8)
+    for var, val in base_assignments.items():
+        base[var] = 1 if val else -1
+
+    state = np.tile(base, (k, 1))
+    triggers = np.asarray(trigger_literals, dtype=np.int64)
+    rows = np.arange(k)
+    trigger_vars = np.abs(triggers)
+    trigger_signs = np.sign(triggers).astype(np.int8)
+
+    status = np.full(k, "CONTINUE", dtype=object)
+    conflict_ids = np.full(k, "None", dtype=object)
+    # Propagation round and reason clause (-1: the trigger) of every assigned variable
+    rounds = np.zeros((k, matrix.num_vars + 1), dtype=np.int32)
+    reasons = np.full((k, matrix.num_vars + 1), -1, dtype=np.int64)
+
+    # A trigger that contradicts the base assignment is an immediate conflict
+    clash = (trigger_vars != 0) & (state[rows, trigger_vars] == -trigger_signs)
+    status[clash] = "CONFLICT"
+    live = trigger_vars != 0
+    state[rows[live], trigger_vars[live]] = trigger_signs[live]
+
+    active = ~clash
+    satisfied_all = np.zeros(k, dtype=bool)
+    round_number = 0
+    while active.any():
+        round_number += 1
+        act = np.nonzero(active)[0]
+        # (rows x clauses x width) literal values: +1 true, -1 false, 0 open (padding is masked out)
+        values = state[act][:, matrix.variables] * matrix.signs
+        is_true = ((values == 1) & matrix.mask).any(axis=2)
+        is_open = (values == 0) & matrix.mask
+        open_count = is_open.sum(axis=2)
+
+        conflict = ~is_true & (open_count == 0)
+        unit = ~is_true & (open_count == 1)
+
+        conflict_rows = conflict.any(axis=1)
+        if conflict_rows.any():
+            hit = act[conflict_rows]
+            status[hit] = "CONFLICT"
+            first = conflict[conflict_rows].argmax(axis=1)
+            conflict_ids[hit] = [f"Clause_{c + 1}" for c in first]
+
+        satisfied_all[act] = is_true.all(axis=1)
+        unit[conflict_rows] = False
+        unit_rows, unit_clauses = np.nonzero(unit)
+        if unit_rows.size == 0:
+            break
+
+        # The single open literal of each unit clause is forced
+        positions = is_open[unit_rows, unit_clauses].argmax(axis=1)
+        forced = matrix.literals[unit_clauses, positions]
+        state[act[unit_rows], np.abs(forced)] = np.sign(forced)
+        rounds[act[unit_rows], np.abs(forced)] = round_number
+        reasons[act[unit_rows], np.abs(forced)] = unit_clauses
+
+        active[act] = False
+        active[np.unique(act[unit_rows])] = True
+
+    status[(status == "CONTINUE") & satisfied_all] = "SAT"
+
+    results = []
+    for i in range(k):
+        changed = np.nonzero(state[i] != base)[0]
+        changed = changed[np.lexsort((reasons[i, changed], rounds[i, changed]))]
+        forced = []
+        for var in changed.tolist():
+            lit = var if state[i, var] > 0 else -var
+            reason = reasons[i, var]
+            forced.append((lit, "DECISION" if reason < 0 else f"Clause_{reason + 1}"))
+        assignments = {abs(lit): lit > 0 for lit, _ in forced}
+        log = f"[DL{dl}] DECIDE L={int(triggers[i])} | BATCH\n" if triggers[i] else f"[DL{dl}] INITIAL CHECK | BATCH\n"
+        results.append({
+            "status": status[i],
+            "assignments": assignments,
+            "log": log,
+            "dl": dl,
+            "conflict_id": conflict_ids[i],
+            "format": 2,
+            "forced": forced,
+        })
+    return results
+
+
+# ==========================================
+# SECTION 6: SHARED-MEMORY CLAUSE DATABASE
+# ==========================================
+def _attach_shared_memory(name):
+    """Opens an existing block without letting this process' resource tracker unlink it on exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 has no 'track' argument: skip the registration by hand
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None if rtype == "shared_memory" else register(name, rtype)
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedClauseDatabase:
+    """
+    Clause database stored once in shared memory as flat arrays:
+        header  : num_clauses, num_literals, max_var      (int64)
+        offsets : num_clauses + 1 start positions          (int64)
+        literals: all clause literals back to back         (int32)
+    Behaves like a read-only list of clauses (each clause is a zero-copy memoryview slice),
+    so it can be passed to DPLLSearchEngine directly. Pickling only sends the block name,
+    which makes handing it to worker processes free.
+    """
+    HEADER = struct.Struct("<qqq")
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.num_clauses, self.num_literals, self.max_var = self.HEADER.unpack_from(shm.buf, 0)
+
+        self.view = shm.buf if owner else shm.buf.toreadonly()
+        offsets_end = self.HEADER.size + 8 * (self.num_clauses + 1)
+        self.offsets = self.view[self.HEADER.size:offsets_end].cast("q")
+        self.literals = self.view[offsets_end:offsets_end + 4 * self.num_literals].cast("i")
+
+    @classmethod
+    def create(cls, cnf_clauses, name=None):
+        """Copies the clauses into a new shared block. The creating process owns (and unlinks) it."""
+        num_literals = sum(len(clause) for clause in cnf_clauses)
+        max_var = max((abs(lit) for clause in cnf_clauses for lit in clause), default=0)
+        size = cls.HEADER.size + 8 * (len(cnf_clauses) + 1) + 4 * num_literals
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+
+        cls.HEADER.pack_into(shm.buf, 0, len(cnf_clauses), num_literals, max_var)
+        offsets = [0]
+        flat = []
+        for clause in cnf_clauses:
+            flat.extend(clause)
+            offsets.append(len(flat))
+        struct.pack_into(f"<{len(offsets)}q", shm.buf, cls.HEADER.size, *offsets)
+        struct.pack_into(f"<{len(flat)}i", shm.buf, cls.HEADER.size + 8 * len(offsets), *flat)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attaches read-only to a database created by another process."""
+        return cls(_attach_shared_memory(name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def __reduce__(self):
+        return (SharedClauseDatabase.attach, (self.shm.name,))
+
+    def __len__(self):
+        return self.num_clauses
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.num_clauses))]
+        if index < 0:
+            index += self.num_clauses
+        if not 0 <= index < self.num_clauses:
+            raise IndexError("clause index out of range")
+        return self.literals[self.offsets[index]:self.offsets[index + 1]]
+
+    def __iter__(self):
+        for i in range(self.num_clauses):
+            yield self.literals[self.offsets[i]:self.offsets[i + 1]]
+
+    def close(self):
+        """
+        Releases this process' views; the owner also frees the block.
+        Clauses handed out by __getitem__ must not be referenced any more.
+        """
+        self.offsets.release()
+        self.literals.release()
+        if not self.owner:
+            self.view.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SharedClauseRing:
+    """
+    Fixed-size ring buffer in shared memory for exchanging short learned clauses between workers.
+    Slot layout (int64): sequence number, clause length, then up to max_len literals.
+    Writers serialize on a multiprocessing lock; readers are lock-free and use the
+    sequence number to skip slots that were overwritten while they read them.
+    """
+    def __init__(self, shm, lock, capacity, max_len, owner):
+        self.shm = shm
+        self.lock = lock
+        self.capacity = capacity
+        self.max_len = max_len
+        self.owner = owner
+        self.slot_size = 2 + max_len
+        self.cells = shm.buf.cast("q")  # cells[0] = number of clauses ever published
+        self.cursor = 0
+
+    @classmethod
+    def create(cls, lock, capacity=1024, max_len=8, name=None):
+        shm = shared_memory.SharedMemory(name=name, create=True, size=8 * (1 + capacity * (2 + max_len)))
+        shm.buf[:] = bytes(shm.size)
+        return cls(shm, lock, capacity, max_len, owner=True)
+
+    @classmethod
+    def attach(cls, name, lock, capacity, max_len):
+        return cls(_attach_shared_memory(name), lock, capacity, max_len, owner=False)
+
+    def __reduce__(self):
+        return (SharedClauseRing.attach, (self.shm.name, self.lock, self.capacity, self.max_len))
+
+    def publish(self, clause):
+        """Adds a learned clause; clauses longer than max_len are not shared."""
+        if len(clause) > self.max_len:
+            return False
+        with self.lock:
+            seq = self.cells[0]
+            base = 1 + (seq % self.capacity) * self.slot_size
+            self.cells[base] = -1  # mark the slot as being written
+            self.cells[base + 1] = len(clause)
+            for i, lit in enumerate(clause):
+                self.cells[base + 2 + i] = lit
+            self.cells[base] = seq
+            self.cells[0] = seq + 1
+        return True
+
+    def read_new(self):
+        """Returns the clauses published since the last call (oldest overwritten ones are lost)."""
+        published = self.cells[0]
+        start = max(self.cursor, published - self.capacity)
+        clauses = []
+        for seq in range(start, published):
+            base = 1 + (seq % self.capacity) * self.slot_size
+            length = self.cells[base + 1]
+            clause = list(self.cells[base + 2:base + 2 + length])
+            if self.cells[base] == seq:
+                clauses.append(clause)
+        self.cursor = published
+        return clauses
+
+    def close(self):
+        self.cells.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ==========================================
+# SECTION 7: IN-PROCESS INFERENCE ENGINE
+# ==========================================
+class InProcessBCPEngine:
+    """
+    Stateful BCP engine that runs inside the solver process, without trigger/output files.
+    Follows the same contract as the external engine: a trigger at DL d first undoes every
+    assignment made at DL >= d, then assigns the trigger and unit-propagates (two watched
+    literals). run() returns the v2 result shape of read_bcp_output: only the literals
+    forced by this trigger, in propagation order, each with its reason clause ID.
+    Native cardinality constraints (see CardinalityConstraint) are propagated next to the
+    clauses with one true-literal counter each, and XOR constraints (see XorConstraint) by
+    incremental Gauss-Jordan elimination over GF(2) once the clauses reach a fixpoint.
+    """
+    def __init__(self, cnf_clauses, num_vars=None, index=None, cardinality=(), xors=()):
+        self.clauses = [list(clause) for clause in cnf_clauses]
+        index = index if index is not None else FormulaIndex(cnf_clauses, num_vars)
+        self.cards = list(cardinality)
+        self.xors = list(xors)
+        extra_max_var = max([abs(lit) for card in self.cards for lit in card.literals]
+                            + [var for xor in self.xors for var in xor.variables], default=0)
+        self.num_vars = max(index.num_vars, extra_max_var)
+
+        self.values = [None] * (self.num_vars + 1)
+        self.levels = [0] * (self.num_vars + 1)
+        self.reasons = [None] * (self.num_vars + 1)  # clause index, ("card", j), ("xor", ...) or None
+        self.trail_pos = [0] * (self.num_vars + 1)
+        self.trail = []
+        self.qhead = 0
+        self.initialized = False
+
+        # Cardinality constraints: literal -> constraint ids, and the number of processed true literals
+        self.card_occurrences = {}
+        self.card_counts = [0] * len(self.cards)
+        for j, card in enumerate(self.cards):
+            for lit in card.literals:
+                self.card_occurrences.setdefault(lit, []).append(j)
+
+        # XOR rows packed as (variable bitmask, parity) pairs. The eliminated matrix is kept
+        # across assignments as [mask, parity, combined original rows] in reduced row echelon
+        # form over the free variables: every row has an unassigned pivot that no other row
+        # contains, or no unassigned variable at all. Assigned columns are tracked as bitmasks.
+        self.xor_rows = [(xor.mask, xor.parity) for xor in self.xors]
+        self.xor_vars = {var for xor in self.xors for var in xor.variables}
+        self.xor_matrix = [[mask, parity, 1 << j] for j, (mask, parity) in enumerate(self.xor_rows)]
+        self.xor_pivot_row = {}  # pivot variable -> row
+        self.xor_pivotless = set()  # rows without an unassigned variable at their last pivoting
+        self.xor_assigned = 0
+        self.xor_true = 0
+        self.xor_qhead = 0
+        self.xor_pending = set()
+        for j in range(len(self.xor_matrix)):
+            self.xor_pivot_on(j)
+        self.xor_pending = set(range(len(self.xor_matrix)))
+
+        # Long clauses use watch lists; binary clauses live in per-literal implication lists:
+        # implications[lit] = [(implied literal, clause index), ...] for every clause (-lit v implied)
+        self.watches = {}
+        self.implications = {}
+        for var in range(1, self.num_vars + 1):
+            self.watches[var] = []
+            self.watches[-var] = []
+            self.implications[var] = []
+            self.implications[-var] = []
+        self.unit_clauses = []
+        self.empty_clauses = []
+        for ci in index.binary_clauses:
+            self.attach_binary(ci)
+        for ci, length in enumerate(index.clause_lengths):
+            if length != 2:
+                self.attach_clause(ci)
+
+    def attach_binary(self, ci):
+        first, second = self.clauses[ci]
+        self.implications[-first].append((second, ci))
+        self.implications[-second].append((first, ci))
+
+    def attach_clause(self, ci):
+        clause = self.clauses[ci]
+        if not clause:
+            self.empty_clauses.append(ci)
+        elif len(clause) == 1:
+            self.unit_clauses.append(ci)
+        elif len(clause) == 2:
+            self.attach_binary(ci)
+        else:
+            self.watches[clause[0]].append(ci)
+            self.watches[clause[1]].append(ci)
+
+    def add_clause(self, clause):
+        """
+        Adds a clause (e.g. one learned by another worker) and returns its index.
+        Takes effect from the next DL 0 trigger, which rebuilds the assignment from scratch.
+        """
+        self.clauses.append(list(clause))
+        ci = len(self.clauses) - 1
+        self.attach_clause(ci)
+        return ci
+
+    def add_variables(self, count):
+        """Grows the engine by count fresh variables and returns the first of them."""
+        first = self.num_vars + 1
+        self.num_vars += count
+        self.values.extend([None] * count)
+        self.levels.extend([0] * count)
+        self.reasons.extend([None] * count)
+        self.trail_pos.extend([0] * count)
+        for var in range(first, self.num_vars + 1):
+            self.watches[var] = []
+            self.watches[-var] = []
+            self.implications[var] = []
+            self.implications[-var] = []
+        return first
+
+    def add_cardinality(self, card):
+        """Adds a CardinalityConstraint; the engine restarts from DL 0 on its next trigger."""
+        self.backtrack(-1)
+        self.initialized = False
+        j = len(self.cards)
+        self.cards.append(card)
+        self.card_counts.append(0)
+        for lit in card.literals:
+            self.card_occurrences.setdefault(lit, []).append(j)
+        return j
+
+    def conflict_decisions(self, conflict_clause, trigger_lit=0):
+        """
+        Decision literals (the trigger included) that the last conflict depends on, found by
+        walking the trail back from the conflict clause through the reasons. Only valid right
+        after run() reported the conflict.
+        """
+        seen = {abs(lit) for lit in conflict_clause or ()}
+        decisions = set()
+        if trigger_lit != 0:
+            seen.add(abs(trigger_lit))
+            decisions.add(trigger_lit)
+        for lit in reversed(self.trail):
+            var = abs(lit)
+            if var not in seen or self.levels[var] == 0:
+                continue
+            reason = self.reasons[var]
+            if reason is None:
+                decisions.add(lit)
+            else:
+                seen.update(abs(m) for m in self.explain(reason, lit))
+        return decisions
+
+    def lit_value(self, lit):
+        """True / False / None (unassigned) for a literal."""
+        val = self.values[abs(lit)]
+        if val is None:
+            return None
+        return val == (lit > 0)
+
+    def assign(self, lit, level, reason):
+        var = abs(lit)
+        self.values[var] = lit > 0
+        self.levels[var] = level
+        self.reasons[var] = reason
+        self.trail_pos[var] = len(self.trail)
+        self.trail.append(lit)
+
+    def backtrack(self, level):
+        """Undoes every assignment made above the given level."""
+        trail = self.trail
+        card_occurrences = self.card_occurrences
+        while trail and self.levels[abs(trail[-1])] > level:
+            lit = trail.pop()
+            if card_occurrences and len(trail) < self.qhead:
+                # Only literals already processed by propagation were counted
+                for j in card_occurrences.get(lit, ()):
+                    self.card_counts[j] -= 1
+            var = abs(lit)
+            if len(trail) < self.xor_qhead and var in self.xor_vars:
+                self.xor_assigned &= ~(1 << var)
+                self.xor_true &= ~(1 << var)
+            self.values[var] = None
+            self.reasons[var] = None
+        self.qhead = min(self.qhead, len(trail))
+        if self.xors:
+            self.xor_qhead = min(self.xor_qhead, len(trail))
+            # Pivots only ever become free on backtrack; rows that were fully assigned may need one again
+            for j in [j for j in self.xor_pivotless if self.xor_matrix[j][0] & ~self.xor_assigned]:
+                self.xor_pivot_on(j)
+                self.xor_pending.add(j)
+            if level < 0:
+                self.xor_pending = set(range(len(self.xor_matrix)))
+
+    def propagate_cardinality(self, true_lit, level):
+        """
+        Counts true_lit in its cardinality constraints. A constraint that reaches its bound
+        forces its remaining literals false; one that exceeds it is a conflict.
+        """
+        occurrences = self.card_occurrences.get(true_lit)
+        if not occurrences:
+            return None
+        counts = self.card_counts
+        for j in occurrences:
+            counts[j] += 1
+        for j in occurrences:
+            card = self.cards[j]
+            if counts[j] > card.bound:
+                return ("card", j)
+            if counts[j] == card.bound:
+                for lit in card.literals:
+                    if self.values[abs(lit)] is None:
+                        self.assign(-lit, level, ("card", j))
+        return None
+
+    def explain(self, reason, lit=None):
+        """
+        Clause behind a reason or conflict. For a cardinality constraint this is the explaining
+        clause: the negation of its true literals (assigned before lit), plus lit itself.
+        """
+        if not isinstance(reason, tuple):
+            return list(self.clauses[reason])
+        if reason[0] == "xor":
+            return list(reason[2])
+        card = self.cards[reason[1]]
+        limit = self.trail_pos[abs(lit)] if lit is not None else len(self.trail)
+        clause = [-t for t in card.literals
+                  if self.lit_value(t) is True and self.trail_pos[abs(t)] < limit]
+        if lit is not None:
+            clause.append(lit)
+        return clause
+
+    def reason_id(self, reason):
+        if isinstance(reason, tuple):
+            if reason[0] == "xor":
+                return f"Xor_{reason[1]+1}"
+            return f"Card_{reason[1]+1}"
+        return f"Clause_{reason+1}"
+
+    def xor_pivot_on(self, j):
+        """
+        Gives row j the lowest unassigned variable as its pivot and eliminates that column from
+        every other row (rows left with no unassigned variable are recorded as pivotless).
+        Only the rows containing the new pivot column change; they are queued for checking.
+        """
+        matrix = self.xor_matrix
+        row = matrix[j]
+        free = row[0] & ~self.xor_assigned
+        if free == 0:
+            self.xor_pivotless.add(j)
+            return
+        self.xor_pivotless.discard(j)
+        pivot_bit = free & -free
+        self.xor_pivot_row[pivot_bit.bit_length() - 1] = j
+        for k, other in enumerate(matrix):
+            if k != j and other[0] & pivot_bit:
+                other[0] ^= row[0]
+                other[1] ^= row[1]
+                other[2] ^= row[2]
+                self.xor_pending.add(k)
+
+    def xor_explanation(self, row, forced_var=0):
+        """Clause implied by an eliminated row: its assigned variables falsified, plus the forced literal."""
+        mask, parity, combination = row
+        rhs = parity ^ (bin(mask & self.xor_true).count("1") & 1)
+        clause = []
+        while mask:
+            low = mask & -mask
+            var = low.bit_length() - 1
+            mask ^= low
+            if var == forced_var:
+                clause.append(var if rhs else -var)
+            else:
+                clause.append(-var if self.values[var] else var)
+        first_row = (combination & -combination).bit_length() - 1
+        return ("xor", first_row, tuple(clause))
+
+    def propagate_xors(self, level):
+        """
+        Incremental Gauss-Jordan elimination over GF(2). Each newly assigned XOR variable only
+        touches the rows containing its column: if it was a row's pivot, that row pivots on
+        another free variable, which is eliminated from the rows that contain it. Touched rows
+        with one free variable force it (always their pivot), rows with none may conflict.
+        Backtracking keeps the matrix, since row operations never depend on the assignment.
+        Returns the conflict or None; forced literals are put on the trail.
+        """
+        matrix = self.xor_matrix
+        trail = self.trail
+        while True:
+            for j in self.xor_pending:
+                row = matrix[j]
+                free = row[0] & ~self.xor_assigned
+                if free & (free - 1):
+                    continue
+                rhs = row[1] ^ (bin(row[0] & self.xor_true).count("1") & 1)
+                if free == 0:
+                    if rhs:
+                        self.xor_pending = set()
+                        return self.xor_explanation(row)
+                    continue
+                var = free.bit_length() - 1
+                val = self.values[var]
+                if val is None:
+                    self.assign(var if rhs else -var, level, self.xor_explanation(row, var))
+                elif val != bool(rhs):
+                    self.xor_pending = set()
+                    return self.xor_explanation(row)
+            self.xor_pending = set()
+
+            if self.xor_qhead == len(trail):
+                return None
+            lit = trail[self.xor_qhead]
+            self.xor_qhead += 1
+            var = abs(lit)
+            if var not in self.xor_vars:
+                continue
+            bit = 1 << var
+            self.xor_assigned |= bit
+            if lit > 0:
+                self.xor_true |= bit
+            j = self.xor_pivot_row.pop(var, None)
+            if j is not None:
+                self.xor_pivot_on(j)
+            for k, row in enumerate(matrix):
+                if row[0] & bit:
+                    self.xor_pending.add(k)
+
+    def propagate_watches(self, level):
+        """
+        Unit propagation to a fixpoint: clause/cardinality propagation, then XOR elimination,
+        repeated while the XORs keep forcing literals. Returns the conflict or None.
+        """
+        while True:
+            conflict = self.propagate_clauses(level)
+            if conflict is not None or not self.xors:
+                return conflict
+            conflict = self.propagate_xors(level)
+            if conflict is not None or self.qhead == len(self.trail):
+                return conflict
+
+    def propagate_clauses(self, level):
+        """
+        Each true literal first updates its cardinality counters, then follows its binary
+        implications by direct lookup, then visits the watch list of the long clauses.
+        Returns the conflict (clause index or ("card", j)) or None.
+        """
+        clauses = self.clauses
+        values = self.values
+        while self.qhead < len(self.trail):
+            true_lit = self.trail[self.qhead]
+            false_lit = -true_lit
+            self.qhead += 1
+
+            if self.card_occurrences:
+                conflict = self.propagate_cardinality(true_lit, level)
+                if conflict is not None:
+                    return conflict
+
+            for implied, ci in self.implications[true_lit]:
+                val = values[abs(implied)]
+                if val is None:
+                    self.assign(implied, level, ci)
+                elif val != (implied > 0):
+                    return ci
+
+            watch_list = self.watches[false_lit]
+            kept = []
+            pos = 0
+            while pos < len(watch_list):
+                ci = watch_list[pos]
+                pos += 1
+                clause = clauses[ci]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                first = clause[0]
+                first_val = values[abs(first)]
+                if first_val is not None and first_val == (first > 0):
+                    kept.append(ci)
+                    continue
+
+                # Look for a replacement watch that is not false
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    val = values[abs(lit)]
+                    if val is None or val == (lit > 0):
+                        clause[1], clause[k] = lit, clause[1]
+                        self.watches[lit].append(ci)
+                        break
+                else:
+                    kept.append(ci)
+                    if first_val is not None:
+                        kept.extend(watch_list[pos:])
+                        self.watches[false_lit] = kept
+                        return ci
+                    self.assign(first, level, ci)
+            self.watches[false_lit] = kept
+        return None
+
+    def reset(self):
+        """Clears all assignments and re-asserts the unit clauses at DL 0."""
+        self.backtrack(-1)
+        self.initialized = True
+        if self.empty_clauses:
+            return self.empty_clauses[0]
+        for ci in self.unit_clauses:
+            lit = self.clauses[ci][0]
+            val = self.lit_value(lit)
+            if val is False:
+                return ci
+            if val is None:
+                self.assign(lit, 0, ci)
+        for j, card in enumerate(self.cards):
+            if card.bound < 0:
+                return ("card", j)
+            if card.bound == 0:
+                for lit in card.literals:
+                    if self.lit_value(lit) is True:
+                        return ("card", j)
+                    if self.lit_value(lit) is None:
+                        self.assign(-lit, 0, ("card", j))
+        return None
+
+    def run(self, trigger_lit, dl):
+        """Processes one trigger (0 = initial check at DL 0) and returns the v2 result dict."""
+        conflict_lit = None
+        if dl == 0 or not self.initialized:
+            start = 0
+            conflict = self.reset()
+            if conflict is None:
+                conflict = self.propagate_watches(0)
+        else:
+            self.backtrack(dl - 1)
+            start = len(self.trail)
+            conflict = None
+
+        if conflict is None and trigger_lit != 0:
+            val = self.lit_value(trigger_lit)
+            if val is False:
+                conflict = self.reasons[abs(trigger_lit)]
+                conflict = -1 if conflict is None else conflict
+                conflict_lit = -trigger_lit
+            elif val is None:
+                self.assign(trigger_lit, dl, None)
+        if conflict is None:
+            conflict = self.propagate_watches(dl)
+
+        forced = []
+        for lit in self.trail[start:]:
+            reason = self.reasons[abs(lit)]
+            forced.append((lit, "DECISION" if reason is None else self.reason_id(reason)))
+
+        conflict_clause = None
+        if conflict is not None:
+            status = "CONFLICT"
+            if conflict == -1:
+                conflict_id = "None"
+            else:
+                conflict_id = self.reason_id(conflict)
+                conflict_clause = self.explain(conflict, conflict_lit)
+        else:
+            status = "SAT" if len(self.trail) == self.num_vars else "CONTINUE"
+            conflict_id = "None"
+
+        if trigger_lit != 0:
+            log = f"[DL{dl}] DECIDE L={trigger_lit} |\n[DL{dl}] PROPAGATION...\n"
+        else:
+            log = f"[DL{dl}] INITIAL CHECK\n[DL{dl}] PROPAGATION...\n"
+        return {
+            "status": status,
+            "assignments": {abs(lit): lit > 0 for lit, _ in forced},
+            "log": log,
+            "dl": dl,
+            "conflict_id": conflict_id,
+            "format": 2,
+            "forced": forced,
+            "conflict_clause": conflict_clause,
+        }
+
+
+# ==========================================
+# SECTION 8: FORMULA INDEX
+# ==========================================
+class FormulaIndex:
+    """
+    Per-formula data computed once and shared by the solver and the engines, so that
+    no per-decision work has to rescan the clause list:
+        max_var / num_vars, variables (1..num_vars)
+        clause_lengths and static JW weights per variable
+        jw_order: the variables sorted by decreasing JW weight
+        binary_clauses: clause indices of length 2 (implication lists, equivalence SCCs)
+        pos_occurrences / neg_occurrences: variable -> clause indices (local search), built
+            on first use so that engines which never walk occurrences do not pay for them
+    """
+    def __init__(self, cnf_clauses, num_vars=None):
+        self.clauses = cnf_clauses
+        self.num_clauses = len(cnf_clauses)
+        self.clause_lengths = [len(clause) for clause in cnf_clauses]
+
+        self.max_var = max((abs(lit) for clause in cnf_clauses for lit in clause), default=0)
+        self.num_vars = max(self.max_var, num_vars or 0)
+        self.variables = tuple(range(1, self.num_vars + 1))
+
+        self.jw_weights = [0.0] * (self.num_vars + 1)
+        self.binary_clauses = []
+        self._occurrences = None
+
+        for ci, clause in enumerate(cnf_clauses):
+            length = self.clause_lengths[ci]
+            weight = 2.0 ** (-length)
+            for lit in clause:
+                self.jw_weights[abs(lit)] += weight
+            if length == 2:
+                self.binary_clauses.append(ci)
+
+        # Variables by decreasing JW weight (ties: lower variable first), scanned by the search's cursor
+        jw_weights = self.jw_weights
+        self.jw_order = sorted(self.variables, key=lambda var: (-jw_weights[var], var))
+
+    def occurrences(self):
+        """(pos_occurrences, neg_occurrences), built on the first call."""
+        if self._occurrences is None:
+            pos = [[] for _ in range(self.num_vars + 1)]
+            neg = [[] for _ in range(self.num_vars + 1)]
+            for ci in range(self.num_clauses):
+                for lit in self.clauses[ci]:
+                    (pos if lit > 0 else neg)[abs(lit)].append(ci)
+            self._occurrences = (pos, neg)
+        return self._occurrences
+
+    @property
+    def pos_occurrences(self):
+        return self.occurrences()[0]
+
+    @property
+    def neg_occurrences(self):
+        return self.occurrences()[1]
+
+
+_last_formula_index = (None, None, None)
+
+
+def formula_index_for(cnf_clauses, num_vars=None):
+    """FormulaIndex of a clause list, reused for as long as the same list (not grown) and variable count are passed."""
+    global _last_formula_index
+    indexed_clauses, indexed_num_vars, index = _last_formula_index
+    if indexed_clauses is not cnf_clauses or indexed_num_vars != num_vars or index.num_clauses != len(cnf_clauses):
+        index = FormulaIndex(cnf_clauses, num_vars)
+        _last_formula_index = (cnf_clauses, num_vars, index)
+    return index
+
+
+# ==========================================
+# SECTION 9: STOCHASTIC LOCAL SEARCH (WALKSAT / PROBSAT)
+# ==========================================
+class LocalSearchSolver:
+    """
+    WalkSAT / probSAT local search for satisfiable-heavy workloads.
+    Keeps per-clause true-literal counts, incremental break/make counts per variable and
+    an unsatisfied-clause list with O(1) add/remove, so a flip only touches the clauses
+    of the flipped variable.
+    """
+    def __init__(self, cnf_clauses, num_vars, seed=None, algorithm="probsat", noise=0.567, cb=2.06,
+                 index=None):
+        index = index if index is not None else FormulaIndex(cnf_clauses, num_vars)
+        self.num_vars = index.num_vars
+        self.rng = random.Random(seed)
+        self.algorithm = algorithm
+        self.noise = noise
+        self.cb = cb
+
+        # Duplicate literals and tautologies would spoil the break counts
+        self.clauses = []
+        for clause in cnf_clauses:
+            lits = list(dict.fromkeys(clause))
+            if not any(-lit in lits for lit in lits):
+                self.clauses.append(lits)
+        # No flip can satisfy an empty clause (e.g. the [[]] of substitute_equivalent_literals)
+        self.has_empty_clause = any(not clause for clause in self.clauses)
+        if len(self.clauses) == index.num_clauses and all(
+                len(lits) == length for lits, length in zip(self.clauses, index.clause_lengths)):
+            # Nothing was cleaned, so the clause indices are the index's
+            self.pos_occurrences, self.neg_occurrences = index.occurrences()
+        else:
+            self.pos_occurrences, self.neg_occurrences = FormulaIndex(self.clauses, self.num_vars).occurrences()
+
+        # probSAT polynomial break distribution, tabulated once
+        self.break_weights = [(1.0 + b) ** (-cb) for b in range(64)]
+
+    def initialize(self, initial=None):
+        rng = self.rng
+        self.values = [False] + [
+            initial[var] if initial and var in initial else rng.random() < 0.5
+            for var in range(1, self.num_vars + 1)
+        ]
+        self.true_count = [0] * len(self.clauses)
+        self.true_var_sum = [0] * len(self.clauses)  # equals the critical variable when true_count == 1
+        self.break_count = [0] * (self.num_vars + 1)
+        self.make_count = [0] * (self.num_vars + 1)
+        self.unsat = []
+        self.unsat_pos = [-1] * len(self.clauses)
+
+        for ci, clause in enumerate(self.clauses):
+            for lit in clause:
+                if self.values[abs(lit)] == (lit > 0):
+                    self.true_count[ci] += 1
+                    self.true_var_sum[ci] += abs(lit)
+            if self.true_count[ci] == 0:
+                self.add_unsat(ci)
+            elif self.true_count[ci] == 1:
+                self.break_count[self.true_var_sum[ci]] += 1
+
+    def add_unsat(self, ci):
+        self.unsat_pos[ci] = len(self.unsat)
+        self.unsat.append(ci)
+        for lit in self.clauses[ci]:
+            self.make_count[abs(lit)] += 1
+
+    def remove_unsat(self, ci):
+        pos = self.unsat_pos[ci]
+        last = self.unsat.pop()
+        if last != ci:
+            self.unsat[pos] = last
+            self.unsat_pos[last] = pos
+        self.unsat_pos[ci] = -1
+        for lit in self.clauses[ci]:
+            self.make_count[abs(lit)] -= 1
+
+    def flip(self, var):
+        new_val = not self.values[var]
+        self.values[var] = new_val
+        if new_val:
+            gained, lost = self.pos_occurrences[var], self.neg_occurrences[var]
+        else:
+            gained, lost = self.neg_occurrences[var], self.pos_occurrences[var]
+
+        for ci in gained:
+            count = self.true_count[ci]
+            if count == 0:
+                self.remove_unsat(ci)
+                self.break_count[var] += 1
+            elif count == 1:
+                self.break_count[self.true_var_sum[ci]] -= 1
+            self.true_count[ci] = count + 1
+            self.true_var_sum[ci] += var
+
+        for ci in lost:
+            count = self.true_count[ci] - 1
+            self.true_count[ci] = count
+            self.true_var_sum[ci] -= var
+            if count == 0:
+                self.break_count[var] -= 1
+                self.add_unsat(ci)
+            elif count == 1:
+                self.break_count[self.true_var_sum[ci]] += 1
+
+    def pick_variable(self, clause):
+        rng = self.rng
+        variables = [abs(lit) for lit in clause]
+        breaks = [self.break_count[var] for var in variables]
+
+        if self.algorithm == "walksat":
+            # SKC: free moves first, otherwise a random walk with probability 'noise'
+            if 0 in breaks:
+                return variables[breaks.index(0)]
+            if rng.random() < self.noise:
+                return rng.choice(variables)
+            return variables[breaks.index(min(breaks))]
+
+        table = self.break_weights
+        weights = [table[b] if b < len(table) else (1.0 + b) ** (-self.cb) for b in breaks]
+        return rng.choices(variables, weights)[0]
+
+    def run(self, max_flips=100000, time_budget=None, initial=None):
+        """
+        Flips until every clause is satisfied or a budget runs out (at once with an empty clause).
+        Returns a dict with status ("SAT" or "UNKNOWN"), the best assignment found as the
+        model, the number of unsatisfied clauses under it and the flips used.
+        """
+        self.initialize(initial)
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        best_unsat = len(self.unsat)
+        best_values = list(self.values)
+
+        flips = 0
+        while self.unsat and flips < max_flips and not self.has_empty_clause:
+            if deadline is not None and flips % 1024 == 0 and time.monotonic() > deadline:
+                break
+            ci = self.unsat[self.rng.randrange(len(self.unsat))]
+            self.flip(self.pick_variable(self.clauses[ci]))
+            flips += 1
+            if len(self.unsat) < best_unsat:
+                best_unsat = len(self.unsat)
+                best_values = list(self.values)
+
+        return {
+            "status": "SAT" if best_unsat == 0 else "UNKNOWN",
+            "model": {var: best_values[var] for var in range(1, self.num_vars + 1)},
+            "unsat_clauses": best_unsat,
+            "flips": flips,
+        }
+
+
+# ==========================================
+# SECTION 10: EQUIVALENT-LITERAL SUBSTITUTION
+# ==========================================
+def binary_implication_sccs(cnf_clauses, num_vars, index=None):
+    """
+    Strongly connected components of the implication graph of the binary clauses
+    (clause (a v b) gives the edges -a -> b and -b -> a). Iterative Tarjan.
+    With a FormulaIndex of the clauses, only its binary partition is visited.
+    """
+    graph = {lit: [] for var in range(1, num_vars + 1) for lit in (var, -var)}
+    if index is not None:
+        binary = (cnf_clauses[ci] for ci in index.binary_clauses)
+    else:
+        binary = (clause for clause in cnf_clauses if len(clause) == 2)
+    for a, b in binary:
+        graph[-a].append(b)
+        graph[-b].append(a)
+
+    index_of = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in graph:
+        if root in index_of:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, edge_pos = work.pop()
+            if edge_pos == 0:
+                index_of[node] = lowlink[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack.add(node)
+
+            successors = graph[node]
+            if edge_pos < len(successors):
+                work.append((node, edge_pos + 1))
+                succ = successors[edge_pos]
+                if succ not in index_of:
+                    work.append((succ, 0))
+                elif succ in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[succ])
+                continue
+
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    lit = stack.pop()
+                    on_stack.discard(lit)
+                    component.append(lit)
+                    if lit == node:
+                        break
+                components.append(component)
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+    return components
+
+
+def substitute_equivalent_literals(cnf_clauses, num_vars, index=None):
+    """
+    Optional preprocessing pass: literals in the same SCC of the binary implication graph are
+    equivalent, so each is replaced by its component's representative (the literal with the
+    smallest variable). Returns (reduced clauses, representatives) where representatives maps
+    every substituted variable to the literal that replaced it. If some x is equivalent to -x
+    the formula is UNSAT and the reduced formula is just the empty clause.
+    """
+    representatives = {}
+    for component in binary_implication_sccs(cnf_clauses, num_vars, index):
+        if len(component) < 2:
+            continue
+        members = set(component)
+        if any(-lit in members for lit in members):
+            return [[]], {}
+        rep = min(component, key=abs)
+        for lit in component:
+            if lit != rep:
+                representatives[abs(lit)] = rep if lit > 0 else -rep
+
+    reduced = []
+    seen = set()
+    for clause in cnf_clauses:
+        lits = []
+        for lit in clause:
+            rep = representatives.get(abs(lit))
+            lits.append(lit if rep is None else (rep if lit > 0 else -rep))
+        lits = list(dict.fromkeys(lits))
+        if any(-lit in lits for lit in lits):
+            continue  # tautology
+        key = tuple(sorted(lits))
+        if key not in seen:
+            seen.add(key)
+            reduced.append(lits)
+    return reduced, representatives
+
+
+def expand_equivalent_model(model, representatives):
+    """Adds the substituted variables back into a model of the reduced formula."""
+    full = dict(model)
+    for var, rep in representatives.items():
+        rep_val = model.get(abs(rep), False)
+        full[var] = rep_val if rep > 0 else not rep_val
+    return full
+
+
+# ==========================================
+# SECTION 11: CARDINALITY CONSTRAINTS
+# ==========================================
+class CardinalityConstraint:
+    """
+    Native at-most-k constraint: at most 'bound' of the literals may be true.
+    Passed to InProcessBCPEngine(cardinality=...) next to the regular clauses instead of
+    an O(n^2) pairwise or sequential-counter clause encoding.
+    """
+    def __init__(self, literals, bound):
+        self.literals = list(dict.fromkeys(literals))
+        self.bound = bound
+
+    def __repr__(self):
+        return f"AtMost({self.bound}, {self.literals})"
+
+    def is_satisfied(self, model):
+        return sum(1 for lit in self.literals if model.get(abs(lit)) == (lit > 0)) <= self.bound
+
+
+def at_most_one(literals):
+    return CardinalityConstraint(literals, 1)
+
+
+def exactly_one(literals):
+    """Exactly-one as a (clause, at-most-one constraint) pair."""
+    return list(literals), CardinalityConstraint(literals, 1)
+
+
+# ==========================================
+# SECTION 12: XOR CONSTRAINTS
+# ==========================================
+class XorConstraint:
+    """
+    Native parity constraint: the XOR of the variables equals parity (True / False).
+    Stored as a packed bit-vector row (bit v set for variable v) for Gaussian elimination.
+    """
+    def __init__(self, variables, parity):
+        self.parity = int(bool(parity))
+        self.mask = 0
+        for var in variables:
+            self.mask ^= 1 << abs(var)  # x XOR x cancels
+            if var < 0:
+                self.parity ^= 1  # a negated variable flips the parity
+        self.variables = [var for var in range(self.mask.bit_length()) if self.mask >> var & 1]
+
+    def __repr__(self):
+        return f"Xor({self.variables} = {self.parity})"
+
+    def is_satisfied(self, model):
+        return sum(1 for var in self.variables if model.get(var)) % 2 == self.parity
+
+
+def detect_xors(cnf_clauses, min_size=3, max_size=8):
+    """
+    Recovers XOR constraints from their direct CNF encoding: an XOR over n variables is the
+    2^(n-1) clauses over exactly those variables whose number of negative literals has the
+    same parity. Returns (xors, remaining clauses).
+    """
+    groups = {}
+    for ci, clause in enumerate(cnf_clauses):
+        variables = frozenset(abs(lit) for lit in clause)
+        if min_size <= len(clause) <= max_size and len(variables) == len(clause):
+            groups.setdefault(variables, []).append(ci)
+
+    xors = []
+    used = set()
+    for variables, members in groups.items():
+        if len(members) < 2 ** (len(variables) - 1):
+            continue
+        for neg_parity in (0, 1):
+            patterns = {}
+            for ci in members:
+                negatives = tuple(sorted(lit for lit in cnf_clauses[ci] if lit < 0))
+                if len(negatives) % 2 == neg_parity:
+                    patterns.setdefault(negatives, ci)
+            if len(patterns) == 2 ** (len(variables) - 1):
+                # The clauses forbid exactly the assignments with parity neg_parity
+                xors.append(XorConstraint(sorted(variables), 1 - neg_parity))
+                used.update(ci for ci in members
+                            if sum(1 for lit in cnf_clauses[ci] if lit < 0) % 2 == neg_parity)
+    remaining = [clause for ci, clause in enumerate(cnf_clauses) if ci not in used]
+    return xors, remaining
+
+
+def xor_to_cnf(xor):
+    """Direct CNF encoding of an XOR constraint (2^(n-1) clauses)."""
+    clauses = []
+    n = len(xor.variables)
+    for bits in range(2 ** n):
+        # Forbid each assignment with the wrong parity
+        if bin(bits).count("1") % 2 != xor.parity:
+            clauses.append([-var if bits >> i & 1 else var for i, var in enumerate(xor.variables)])
+    return clauses
+
+
+# ==========================================
+# SECTION 13: SEARCH CHECKPOINTS
+# ==========================================
+CHECKPOINT_MAGIC = b"DPLLCKP2"
+CHECKPOINT_FORMAT = """
+    magic "DPLLCKP2", formula key (32 bytes, SHA-256 of formula_cache_key)
+    u32 assumption count, then i32 literal per assumption (the guiding path below the frames)
+    u32 stat count,  then per stat: u8 name length, name, i64 value
+    u32 frame count, then per frame: i32 variable, u8 current branch, u8 branch count, i32 literals
+    u32 phase count, then i32 literal per variable (the sign is the phase)
+    u32 implication count, then i32 literal, i32 implied literal pairs
+"""
+
+
+def encode_checkpoint(snapshot):
+    """Packs a search snapshot into the compact binary layout described in CHECKPOINT_FORMAT."""
+    out = bytearray(CHECKPOINT_MAGIC)
+    out += bytes.fromhex(snapshot["formula_key"])
+
+    assumptions = snapshot["assumptions"]
+    out += struct.pack(f"<I{len(assumptions)}i", len(assumptions), *assumptions)
+
+    stats = [(name.encode(), int(value)) for name, value in snapshot["stats"].items()]
+    out += struct.pack("<I", len(stats))
+    for name, value in stats:
+        out += struct.pack(f"<B{len(name)}sq", len(name), name, value)
+
+    frames = snapshot["frames"]
+    out += struct.pack("<I", len(frames))
+    for var, branches, index in frames:
+        out += struct.pack(f"<iBB{len(branches)}i", var, index, len(branches), *branches)
+
+    phases = [var if val else -var for var, val in snapshot["phases"].items()]
+    out += struct.pack(f"<I{len(phases)}i", len(phases), *phases)
+
+    pairs = [x for lit, implied in snapshot["implications"].items() for m in implied for x in (lit, m)]
+    out += struct.pack(f"<I{len(pairs)}i", len(pairs) // 2, *pairs)
+    return bytes(out)
+
+
+def read_checkpoint(path):
+    """Reads a checkpoint file back into the snapshot dict written by DPLLSearchEngine.write_checkpoint."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(CHECKPOINT_MAGIC):
+        raise ValueError(f"'{path}' is not a DPLL checkpoint")
+    pos = len(CHECKPOINT_MAGIC)
+    snapshot = {"formula_key": data[pos:pos + 32].hex()}
+    pos += 32
+
+    def take(fmt):
+        nonlocal pos
+        values = struct.unpack_from(fmt, data, pos)
+        pos += struct.calcsize(fmt)
+        return values
+
+    count = take("<I")[0]
+    snapshot["assumptions"] = list(take(f"<{count}i"))
+
+    stats = {}
+    for _ in range(take("<I")[0]):
+        name_len = take("<B")[0]
+        name, value = take(f"<{name_len}sq")
+        stats[name.decode()] = value
+    snapshot["stats"] = stats
+
+    frames = []
+    for _ in range(take("<I")[0]):
+        var, index, count = take("<iBB")
+        frames.append((var, list(take(f"<{count}i")), index))
+    snapshot["frames"] = frames
+
+    count = take("<I")[0]
+    snapshot["phases"] = {abs(lit): lit > 0 for lit in take(f"<{count}i")}
+
+    count = take("<I")[0]
+    pairs = take(f"<{2 * count}i")
+    implications = {}
+    for k in range(0, len(pairs), 2):
+        implications.setdefault(pairs[k], set()).add(pairs[k + 1])
+    snapshot["implications"] = implications
+    return snapshot
+
+
+# ==========================================
+# SECTION 14: DISTRIBUTED SEARCH (TCP COORDINATOR / WORKERS)
+# ==========================================
+DISTRIBUTED_PROTOCOL = """
+    One JSON object per line over TCP; literals are signed integers.
+    worker -> coordinator:  {"type": "hello"}
+                            {"type": "result", "cube": id, "status": "SAT" | "UNSAT", "model": [lits] | null}
+                            {"type": "donation", "paths": [[lits], ...]}   (answer to "split", may be empty)
+                            {"type": "learned", "clauses": [[lits], ...]}
+    coordinator -> worker:  {"type": "formula", "clauses": [[lits], ...], "num_vars": n}
+                            {"type": "cube", "cube": id, "literals": [lits]}
+                            {"type": "split"}   (donate the shallowest untried branch)
+                            {"type": "learned", "clauses": [[lits], ...]}
+                            {"type": "stop"}
+"""
+
+
+class _SearchStopped(Exception):
+    """Raised inside a worker's decision hook when the coordinator ends the search."""
+
+
+class MessageChannel:
+    """Newline-delimited JSON messages over a connected socket."""
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = b""
+        self.messages = deque()
+        self.closed = False
+
+    def send(self, message):
+        self.sock.sendall(json.dumps(message).encode() + b"\n")
+
+    def feed(self):
+        """Reads one chunk from the socket (may block); returns False once the peer has closed."""
+        try:
+            data = self.sock.recv(65536)
+        except OSError:
+            data = b""
+        if not data:
+            self.closed = True
+            return False
+        self.buffer += data
+        *lines, self.buffer = self.buffer.split(b"\n")
+        self.messages.extend(json.loads(line) for line in lines if line)
+        return True
+
+    def receive(self, block=True):
+        """Next message, or None when the peer has closed (or, without block, nothing has arrived)."""
+        while not self.messages and not self.closed:
+            if not block and not select.select([self.sock], [], [], 0)[0]:
+                return None
+            self.feed()
+        return self.messages.popleft() if self.messages else None
+
+
+class DistributedCoordinator:
+    """
+    Splits the search into guiding paths (cubes) over the split_depth highest-JW variables and
+    hands them to worker agents (run_worker) over TCP. When a worker is idle and no cube is
+    pending, busy workers are asked to donate their shallowest untried branch. A worker whose
+    connection drops has its cube re-queued. Learned clauses of at most share_max_len literals
+    are forwarded to the other workers. The formula is UNSAT once every cube has been refuted.
+    """
+    def __init__(self, cnf_clauses, num_vars, host="127.0.0.1", port=0, split_depth=2, share_max_len=3):
+        self.clauses = [list(clause) for clause in cnf_clauses]
+        self.num_vars = num_vars
+        self.share_max_len = share_max_len
+        self.listener = socket.create_server((host, port))
+        self.address = self.listener.getsockname()[:2]
+        self.selector = None
+
+        self.pending = deque()  # (cube id, literals) not yet handed out
+        self.active = {}  # cube id -> literals, for cubes a worker is solving
+        self.workers = {}  # socket -> {"channel", "ready", "cube", "split_requested", "can_split"}
+        self.next_cube_id = 0
+        self.stats = {"workers": 0, "cubes": 0, "refuted": 0, "donations": 0, "requeued": 0,
+                      "invalid_models": 0, "shared_clauses": 0}
+
+        index = FormulaIndex(cnf_clauses, num_vars)
+        split_vars = sorted(index.variables, key=index.jw_weights.__getitem__, reverse=True)[:split_depth]
+        cubes = [[]]
+        for var in split_vars:
+            cubes = [cube + [lit] for cube in cubes for lit in (var, -var)]
+        for cube in cubes:
+            self.add_cube(cube)
+
+    def add_cube(self, literals):
+        self.pending.append((self.next_cube_id, list(literals)))
+        self.next_cube_id += 1
+        self.stats["cubes"] += 1
+
+    def send(self, conn, message):
+        """Sends to one worker; a worker that cannot be reached is dropped."""
+        try:
+            self.workers[conn]["channel"].send(message)
+            return True
+        except OSError:
+            self.drop_worker(conn)
+            return False
+
+    def drop_worker(self, conn):
+        """Forgets a worker and re-queues the cube it was solving."""
+        worker = self.workers.pop(conn, None)
+        if worker is None:
+            return
+        self.selector.unregister(conn)
+        conn.close()
+        cube_id = worker["cube"]
+        if cube_id is not None and cube_id in self.active:
+            self.pending.appendleft((cube_id, self.active.pop(cube_id)))
+            self.stats["requeued"] += 1
+
+    def handle(self, conn, message):
+        """Processes one worker message; returns the model once a cube is satisfiable."""
+        worker = self.workers[conn]
+        kind = message["type"]
+        if kind == "hello":
+            worker["ready"] = self.send(conn, {"type": "formula", "clauses": self.clauses,
+                                               "num_vars": self.num_vars})
+        elif kind == "result":
+            cube_id = message["cube"]
+            worker["cube"] = None
+            if message["status"] == "SAT":
+                model = {abs(lit): lit > 0 for lit in (message["model"] or ())}
+                if all(any(model.get(abs(lit)) == (lit > 0) for lit in clause) for clause in self.clauses):
+                    return model
+                # A model that fails verification proves nothing: the cube is solved again
+                self.stats["invalid_models"] += 1
+                if cube_id in self.active:
+                    self.pending.appendleft((cube_id, self.active.pop(cube_id)))
+            elif message["status"] == "UNSAT":
+                self.active.pop(cube_id, None)
+                self.stats["refuted"] += 1
+            elif cube_id in self.active:
+                self.pending.appendleft((cube_id, self.active.pop(cube_id)))
+        elif kind == "donation":
+            worker["split_requested"] = False
+            worker["can_split"] = bool(message["paths"])
+            for path in message["paths"]:
+                self.add_cube(path)
+                self.stats["donations"] += 1
+        elif kind == "learned":
+            shared = [clause for clause in message["clauses"] if len(clause) <= self.share_max_len]
+            if shared:
+                self.stats["shared_clauses"] += len(shared)
+                for other in list(self.workers):
+                    if other is not conn and other in self.workers and self.workers[other]["ready"]:
+                        self.send(other, {"type": "learned", "clauses": shared})
+        return None
+
+    def dispatch(self):
+        """Hands pending cubes to idle workers, or asks busy workers to split for the idle ones."""
+        for conn in list(self.workers):
+            worker = self.workers.get(conn)
+            if worker is None or not worker["ready"] or worker["cube"] is not None or not self.pending:
+                continue
+            cube_id, literals = self.pending.popleft()
+            self.active[cube_id] = literals
+            worker["cube"], worker["can_split"] = cube_id, True
+            self.send(conn, {"type": "cube", "cube": cube_id, "literals": literals})
+
+        idle = sum(1 for w in self.workers.values() if w["ready"] and w["cube"] is None)
+        requested = sum(1 for w in self.workers.values() if w["split_requested"])
+        for conn in list(self.workers):
+            if idle <= requested or self.pending:
+                break
+            worker = self.workers.get(conn)
+            if worker is not None and worker["cube"] is not None and worker["can_split"] \
+                    and not worker["split_requested"]:
+                worker["split_requested"] = True
+                requested += 1
+                self.send(conn, {"type": "split"})
+
+    def run(self, timeout=None):
+        """Serves workers until a model is found, every cube is refuted (UNSAT) or the timeout passes."""
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        status, model = "UNKNOWN", None
+        try:
+            while status == "UNKNOWN":
+                if not self.pending and not self.active:
+                    status = "UNSAT"
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                for key, _ in self.selector.select(timeout=0.1):
+                    if key.fileobj is self.listener:
+                        conn, _ = self.listener.accept()
+                        self.selector.register(conn, selectors.EVENT_READ)
+                        self.workers[conn] = {"channel": MessageChannel(conn), "ready": False, "cube": None,
+                                              "split_requested": False, "can_split": True}
+                        self.stats["workers"] += 1
+                        continue
+                    conn = key.fileobj
+                    if conn not in self.workers:
+                        continue
+                    channel = self.workers[conn]["channel"]
+                    if not channel.feed():
+                        self.drop_worker(conn)
+                        continue
+                    while channel.messages and conn in self.workers and model is None:
+                        model = self.handle(conn, channel.messages.popleft())
+                    if model is not None:
+                        status = "SAT"
+                        break
+                self.dispatch()
+        finally:
+            for conn in list(self.workers):
+                self.workers[conn]["cube"] = None  # the search is over; nothing to re-queue
+                self.send(conn, {"type": "stop"})
+                self.drop_worker(conn)
+            self.selector.close()
+            self.listener.close()
+        return {"status": status, "model": model, "stats": dict(self.stats)}
+
+
+def run_worker(host, port, share_max_len=3):
+    """
+    Worker agent: connects to a DistributedCoordinator and solves the cubes it receives with a
+    DPLLSearchEngine over one reused InProcessBCPEngine. Coordinator messages are polled before
+    each decision. Every conflict yields the lemma "NOT (decisions it depends on)"; those of at
+    most share_max_len literals are sent out, and clauses learned by other workers are added
+    between cubes. Returns the number of cubes solved.
+    """
+    channel = MessageChannel(socket.create_connection((host, port)))
+    solved = 0
+    try:
+        channel.send({"type": "hello"})
+        formula = channel.receive()
+        if formula is None or formula["type"] != "formula":
+            return solved
+        clauses, num_vars = formula["clauses"], formula["num_vars"]
+        index = FormulaIndex(clauses, num_vars)
+        engine = InProcessBCPEngine(clauses, num_vars, index=index)
+        incoming, outgoing = [], []
+
+        def handle(message, solver):
+            kind = message["type"]
+            if kind == "learned":
+                incoming.extend(message["clauses"])
+            elif kind == "split":
+                path = solver.donate_branch() if solver is not None else None
+                channel.send({"type": "donation", "paths": [path] if path else []})
+            elif kind == "stop":
+                raise _SearchStopped()
+
+        def poll(solver):
+            while True:
+                message = channel.receive(block=False)
+                if message is None:
+                    break
+                handle(message, solver)
+            if channel.closed:
+                raise _SearchStopped()
+            if outgoing:
+                channel.send({"type": "learned", "clauses": outgoing[:]})
+                outgoing.clear()
+
+        shared = set()
+
+        def share(literal, bcp_res):
+            # Reason-based lemma: only the decisions (cube literals included) this conflict depends on
+            decisions = engine.conflict_decisions(bcp_res.get("conflict_clause"), literal)
+            lemma = sorted(-lit for lit in decisions)
+            if len(lemma) <= share_max_len and tuple(lemma) not in shared:
+                shared.add(tuple(lemma))
+                outgoing.append(lemma)
+
+        while True:
+            message = channel.receive()
+            if message is None:
+                break
+            if message["type"] != "cube":
+                handle(message, None)
+                continue
+            # The engine restarts from DL 0 for every cube, so learned clauses are safe to attach now
+            for clause in incoming:
+                engine.add_clause(clause)
+            incoming.clear()
+
+            solver = DPLLSearchEngine(clauses, num_vars, engine=engine, index=index)
+            solver.FILE_MASTER_TRACE = os.devnull
+            solver.decision_hook = poll
+            solver.conflict_listener = share
+            result = solver.solve(assumptions=message["literals"])
+            poll(None)
+            model = None
+            if result["status"] == "SAT":
+                model = [var if val else -var for var, val in result["model"].items()]
+            channel.send({"type": "result", "cube": message["cube"], "status": result["status"],
+                          "model": model})
+            solved += 1
+    except (_SearchStopped, OSError):
+        pass
+    finally:
+        channel.sock.close()
+    return solved
+
+
+def solve_distributed(cnf_clauses, num_vars, workers=4, split_depth=None, share_max_len=3, timeout=None):
+    """Runs a DistributedCoordinator on localhost with worker agents in local processes."""
+    if split_depth is None:
+        split_depth = max(1, (workers - 1).bit_length() + 1)
+    coordinator = DistributedCoordinator(cnf_clauses, num_vars, split_depth=split_depth,
+                                         share_max_len=share_max_len)
+    host, port = coordinator.address
+    processes = [multiprocessing.Process(target=run_worker, args=(host, port, share_max_len), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        return coordinator.run(timeout=timeout)
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+# ==========================================
+# SECTION 15: SYMMETRY BREAKING
+# ==========================================
+class _SymmetryBudgetExhausted(Exception):
+    """Raised when the automorphism search has refined max_nodes partitions."""
+
+
+def symmetry_graph(cnf_clauses, num_vars):
+    """
+    Clause-literal coloured graph of a formula. Vertices 2k and 2k + 1 are the literals +v and -v
+    of the k-th variable in `variables`, joined by a negation edge. Each distinct clause adds one
+    vertex joined to its literals. Literal vertices have colour 0, clause vertices colour 1.
+    Returns (variables, adjacency sets, colours).
+    """
+    variables = tuple(range(1, max([num_vars] + [abs(lit) for clause in cnf_clauses for lit in clause]) + 1))
+    position = {var: k for k, var in enumerate(variables)}
+    adjacency = [set() for _ in range(2 * len(variables))]
+    for k in range(len(variables)):
+        adjacency[2 * k].add(2 * k + 1)
+        adjacency[2 * k + 1].add(2 * k)
+
+    seen = set()
+    for clause in cnf_clauses:
+        key = frozenset(clause)
+        if key in seen:
+            continue
+        seen.add(key)
+        vertex = len(adjacency)
+        adjacency.append({2 * position[abs(lit)] + (lit < 0) for lit in key})
+        for lit_vertex in adjacency[vertex]:
+            adjacency[lit_vertex].add(vertex)
+
+    colors = [0] * (2 * len(variables)) + [1] * (len(adjacency) - 2 * len(variables))
+    return variables, adjacency, colors
+
+
+def refine_coloring(colors, adjacency):
+    """
+    Colour refinement to the coarsest equitable partition finer than `colors`. The new colour
+    of a vertex is the rank of (old colour, sorted neighbour colours), so colour ids only depend
+    on the graph structure and match between isomorphic branches of the search.
+    """
+    num_colors = len(set(colors))
+    while True:
+        signatures = [(colors[v], tuple(sorted(colors[u] for u in adjacency[v]))) for v in range(len(colors))]
+        ranks = {sig: rank for rank, sig in enumerate(sorted(set(signatures)))}
+        colors = [ranks[sig] for sig in signatures]
+        if len(ranks) == num_colors:
+            return colors
+        num_colors = len(ranks)
+
+
+def find_symmetry_generators(cnf_clauses, num_vars, max_nodes=5000):
+    """
+    Generators of the formula's symmetry group: variable permutations, possibly with phase
+    flips, that map the clause set onto itself. They come from the automorphisms of
+    symmetry_graph, found by individualization-refinement. The search follows a first path
+    down to a discrete colouring. Then, deepest level first, it looks for a leaf that matches
+    the first one below every vertex of the target cell that is not yet in the orbit of the
+    first-path vertex. Branches whose cell sizes differ from the first path's are pruned. Once
+    max_nodes refinements are done, the generators found so far are returned. They span a
+    subgroup, which is still sound for symmetry breaking.
+    Each generator maps a moved variable to its image literal.
+    """
+    variables, adjacency, colors = symmetry_graph(cnf_clauses, num_vars)
+    nodes = 0
+
+    def refine(coloring):
+        nonlocal nodes
+        nodes += 1
+        if nodes > max_nodes:
+            raise _SymmetryBudgetExhausted()
+        return refine_coloring(coloring, adjacency)
+
+    def individualize(coloring, vertex):
+        coloring = list(coloring)
+        coloring[vertex] = len(coloring)  # above every rank, so the vertex gets a cell of its own
+        return coloring
+
+    def cell_sizes(coloring):
+        sizes = [0] * len(coloring)
+        for color in coloring:
+            sizes[color] += 1
+        return sizes
+
+    def target_cell(coloring, sizes):
+        """Vertices of the non-singleton cell with the smallest colour id ([] once discrete)."""
+        target = next((color for color, size in enumerate(sizes) if size > 1), None)
+        return [] if target is None else [v for v, color in enumerate(coloring) if color == target]
+
+    def is_automorphism(gamma):
+        return all(colors[gamma[u]] == colors[u] and {gamma[x] for x in adjacency[u]} == adjacency[gamma[u]]
+                   for u in range(len(gamma)))
+
+    automorphisms = []
+    try:
+        # First path: always individualize the first vertex of the target cell
+        path, profiles = [], []
+        node = refine(colors)
+        while True:
+            profiles.append(cell_sizes(node))
+            cell = target_cell(node, profiles[-1])
+            if not cell:
+                break
+            path.append((node, cell))
+            node = refine(individualize(node, cell[0]))
+        vertex_of_leaf_color = {color: v for v, color in enumerate(node)}
+
+        def leaf_search(node, depth):
+            """Automorphism mapping the first leaf to a leaf below this node, or None."""
+            sizes = cell_sizes(node)
+            if sizes != profiles[depth]:
+                return None
+            cell = target_cell(node, sizes)
+            if not cell:
+                gamma = [0] * len(node)
+                for v, color in enumerate(node):
+                    gamma[vertex_of_leaf_color[color]] = v
+                return gamma if is_automorphism(gamma) else None
+            for w in cell:
+                gamma = leaf_search(refine(individualize(node, w)), depth + 1)
+                if gamma is not None:
+                    return gamma
+            return None
+
+        for depth in reversed(range(len(path))):
+            node, cell = path[depth]
+            fixed = [path[k][1][0] for k in range(depth)]
+            # Orbits of the pointwise stabilizer of the first-path prefix found so far
+            orbit = list(range(len(node)))
+
+            def find(v):
+                while orbit[v] != v:
+                    orbit[v] = orbit[orbit[v]]
+                    v = orbit[v]
+                return v
+
+            def merge(gamma):
+                for u, image in enumerate(gamma):
+                    orbit[find(u)] = find(image)
+
+            for gamma in automorphisms:
+                if all(gamma[f] == f for f in fixed):
+                    merge(gamma)
+            for w in cell[1:]:
+                if find(w) == find(cell[0]):
+                    continue
+                gamma = leaf_search(refine(individualize(node, w)), depth + 1)
+                if gamma is not None:
+                    automorphisms.append(gamma)
+                    merge(gamma)
+    except _SymmetryBudgetExhausted:
+        pass
+
+    generators = []
+    for gamma in automorphisms:
+        generator = {}
+        for k, var in enumerate(variables):
+            image = gamma[2 * k]
+            image_lit = variables[image // 2] if image % 2 == 0 else -variables[image // 2]
+            if image_lit != var:
+                generator[var] = image_lit
+        if generator:
+            generators.append(generator)
+    return generators
+
+
+def lex_leader_clauses(generators, num_vars, max_length=None):
+    """
+    Lex-leader symmetry-breaking clauses: for every generator sigma, the assignment of the
+    moved variables (in increasing order) must be lexicographically <= its image under sigma.
+    Only the lex-smallest assignment of each symmetry class needs to survive. Each chain uses
+    auxiliary variables e_k ("the first k positions are equal"), numbered from num_vars + 1.
+    max_length truncates the chains, which weakens them but keeps them sound.
+    Returns (clauses, new number of variables).
+    """
+    clauses = []
+    next_var = num_vars
+    for generator in generators:
+        support = sorted(generator)[:max_length]
+        equal_so_far = None  # e_(k-1); None stands for "true"
+        for k, var in enumerate(support):
+            image = generator[var]
+            guard = [] if equal_so_far is None else [-equal_so_far]
+            if image == -var:
+                clauses.append(guard + [-var])  # x <= -x, and the positions can never be equal
+                break
+            clauses.append(guard + [-var, image])
+            if k == len(support) - 1:
+                break
+            next_var += 1
+            clauses.append(guard + [-var, -image, next_var])
+            clauses.append(guard + [var, image, next_var])
+            equal_so_far = next_var
+    return clauses, next_var
+
+
+def break_symmetries(cnf_clauses, num_vars, max_nodes=5000, max_length=None):
+    """
+    Optional preprocessing pass: appends lex-leader clauses for the detected symmetry generators.
+    Returns (clauses, number of variables including the auxiliary ones). Models of the result
+    restricted to the first num_vars variables are models of the input. A DRAT proof for the
+    result is not a proof for the input, because the added clauses are not implied by it.
+    """
+    generators = find_symmetry_generators(cnf_clauses, num_vars, max_nodes=max_nodes)
+    sbp, total_vars = lex_leader_clauses(generators, num_vars, max_length=max_length)
+    return [list(clause) for clause in cnf_clauses] + sbp, total_vars
+
+
+# ==========================================
+# SECTION 16: CORE-GUIDED WEIGHTED MAXSAT
+# ==========================================
+def parse_wcnf(text):
+    """
+    Parses a weighted CNF in either format:
+    - the classic "p wcnf <vars> <clauses> [<top>]" header, where weights >= top mark hard clauses
+    - the header-less 2022 format, where hard clauses start with "h"
+    Returns (hard clauses, soft clauses as (weight, clause) pairs, num_vars).
+    """
+    hard, soft = [], []
+    top = None
+    num_vars = 0
+    for line in text.splitlines():
+        tokens = line.split()
+        if not tokens or tokens[0] == "c":
+            continue
+        if tokens[0] == "p":
+            num_vars = int(tokens[2])
+            top = int(tokens[4]) if len(tokens) > 4 else None
+            continue
+        clause = [int(tok) for tok in tokens[1:]]
+        if clause and clause[-1] == 0:
+            clause.pop()
+        num_vars = max([num_vars] + [abs(lit) for lit in clause])
+        if tokens[0] == "h":
+            hard.append(clause)
+        else:
+            weight = int(tokens[0])
+            if top is not None and weight >= top:
+                hard.append(clause)
+            elif weight > 0:
+                soft.append((weight, clause))
+    return hard, soft, num_vars
+
+
+class MaxSATSolver:
+    """
+    Core-guided weighted MaxSAT (stratified WPM1, i.e. weighted Fu-Malik) on top of
+    DPLLSearchEngine. All SAT calls share one InProcessBCPEngine.
+    Each soft clause lives in the engine as the hard clause (C v relaxations v s), where s is a
+    selector variable assumed false. The core of an UNSAT call holds the selectors that the
+    refutation's conflicts depend on (InProcessBCPEngine.conflict_decisions). For a core with
+    minimum weight w, every clause in it gets a fresh relaxation variable, all under one native
+    at-most-one constraint. A relaxed copy of weight w replaces the clause: its old selector
+    is retired with a unit clause instead of editing the clause. Any weight above w stays on
+    the original clause. Soft clauses enter by weight stratum, heaviest first.
+    Every model gives an upper bound and every core raises the lower bound by w.
+    """
+    def __init__(self, hard_clauses, soft_clauses, num_vars, on_bound=None, trim_rounds=3):
+        self.num_vars = max([num_vars] + [abs(lit) for clause in hard_clauses for lit in clause]
+                            + [abs(lit) for _, clause in soft_clauses for lit in clause])
+        self.soft = [(weight, list(clause)) for weight, clause in soft_clauses]
+        self.clauses = [list(clause) for clause in hard_clauses]
+        self.engine = InProcessBCPEngine(self.clauses, self.num_vars)
+        self.on_bound = on_bound
+        self.trim_rounds = trim_rounds
+
+        # Active soft clauses: selector -> [weight, clause with its relaxation literals]
+        self.selectors = {}
+        self.lower_bound = 0
+        self.upper_bound = None
+        self.best_model = None
+        self.bounds = []  # (lower, upper) after every change
+        self.stats = {"sat_calls": 0, "cores": 0, "core_literals": 0, "relaxation_vars": 0,
+                      "decisions": 0, "conflicts": 0}
+
+    def add_hard(self, clause):
+        self.clauses.append(list(clause))
+        self.engine.add_clause(clause)
+
+    def add_soft(self, weight, clause):
+        """Adds (clause v s) with a fresh selector s and makes -s an assumption."""
+        selector = self.engine.add_variables(1)
+        self.add_hard(list(clause) + [selector])
+        self.selectors[selector] = [weight, list(clause)]
+
+    def cost(self, model):
+        return sum(weight for weight, clause in self.soft
+                   if not any(model.get(abs(lit)) == (lit > 0) for lit in clause))
+
+    def report(self):
+        self.bounds.append((self.lower_bound, self.upper_bound))
+        if self.on_bound is not None:
+            self.on_bound(self.lower_bound, self.upper_bound)
+
+    def solve_under_assumptions(self, selectors=None):
+        """One SAT call with the given (default: all active) selectors assumed false. Returns (status, model, core)."""
+        assumptions = [-selector for selector in (self.selectors if selectors is None else selectors)]
+        assumption_set = set(assumptions)
+        core = set()
+
+        def collect(literal, bcp_res):
+            decisions = self.engine.conflict_decisions(bcp_res.get("conflict_clause"), literal)
+            core.update(lit for lit in decisions if lit in assumption_set)
+
+        solver = DPLLSearchEngine(self.clauses, self.engine.num_vars, engine=self.engine,
+                                  index=formula_index_for(self.clauses, self.engine.num_vars))
+        solver.FILE_MASTER_TRACE = os.devnull
+        solver.conflict_listener = collect
+        if self.best_model is not None:
+            solver.phases = dict(self.best_model)  # start near the best model so far
+        result = solver.solve(assumptions=assumptions)
+
+        self.stats["sat_calls"] += 1
+        self.stats["decisions"] += result["stats"]["decisions"]
+        self.stats["conflicts"] += result["stats"]["conflicts"]
+        return result["status"], result["model"], [-lit for lit in core]
+
+    def relax(self, core):
+        """WPM1 step for a core of selectors: returns the minimum weight of the core."""
+        min_weight = min(self.selectors[selector][0] for selector in core)
+        first = self.engine.add_variables(len(core))
+        relaxation_vars = list(range(first, first + len(core)))
+        self.stats["relaxation_vars"] += len(core)
+        for selector, relax_var in zip(core, relaxation_vars):
+            weight, clause = self.selectors[selector]
+            if weight > min_weight:
+                self.selectors[selector][0] = weight - min_weight
+            else:
+                del self.selectors[selector]
+                self.add_hard([selector])  # retire the old copy
+            self.add_soft(min_weight, clause + [relax_var])
+        self.engine.add_cardinality(at_most_one(relaxation_vars))
+        return min_weight
+
+    def solve(self, time_budget=None):
+        """
+        Runs until the bounds meet. The result has status OPTIMUM, UNSAT (hard clauses
+        unsatisfiable), SAT (time budget hit with a model) or UNKNOWN. It also has the best
+        model (original variables only), its cost, the final bounds, their history and stats.
+        """
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+        strata = sorted({weight for weight, _ in self.soft}, reverse=True)
+        pending = sorted(self.soft, key=lambda entry: -entry[0])
+        stratum = 0
+        status = "UNKNOWN"
+
+        def enter_stratum():
+            while pending and pending[0][0] >= strata[stratum]:
+                self.add_soft(*pending.pop(0))
+
+        if strata:
+            enter_stratum()
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                status = "SAT" if self.best_model is not None else "UNKNOWN"
+                break
+            call_status, model, core = self.solve_under_assumptions()
+            if call_status == "SAT":
+                cost = self.cost(model)
+                if self.upper_bound is None or cost < self.upper_bound:
+                    self.upper_bound = cost
+                    self.best_model = {var: model.get(var, False) for var in range(1, self.num_vars + 1)}
+                    self.report()
+                if self.upper_bound == self.lower_bound or stratum == len(strata) - 1 or not strata:
+                    self.lower_bound = self.upper_bound  # the last stratum's model is optimal
+                    status = "OPTIMUM"
+                    break
+                stratum += 1
+                enter_stratum()
+            else:
+                if not core:
+                    status = "UNSAT"
+                    break
+                # Trimming: a core is still a core when only its own selectors are assumed
+                for _ in range(self.trim_rounds):
+                    _, _, trimmed = self.solve_under_assumptions(core)
+                    if len(trimmed) >= len(core):
+                        break
+                    core = trimmed
+                self.stats["cores"] += 1
+                self.stats["core_literals"] += len(core)
+                self.lower_bound += self.relax(core)
+                self.report()
+                if self.lower_bound == self.upper_bound:
+                    status = "OPTIMUM"
+                    break
+
+        return {
+            "status": status,
+            "model": self.best_model,
+            "cost": self.upper_bound,
+            "lower_bound": self.lower_bound,
+            "upper_bound": self.upper_bound,
+            "bounds": list(self.bounds),
+            "stats": dict(self.stats),
+        }
+
+
+def solve_maxsat(hard_clauses, soft_clauses, num_vars, time_budget=None, on_bound=None):
+    """Convenience wrapper: MaxSATSolver(...).solve(); see parse_wcnf for reading WCNF files."""
+    return MaxSATSolver(hard_clauses, soft_clauses, num_vars, on_bound=on_bound).solve(time_budget=time_budget)
+
+
 if __name__ == "__main__":
     print("--- BLG 345E Project #4: DPLL Search Engine Demo ---")
     
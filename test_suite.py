@@ -1,10 +1,24 @@
 import os
 import sys
+import time
+import socket
 import shutil
+import pickle
+import random
+import tempfile
+import multiprocessing
 
 # Try to import the solver from main.py
 try:
-    from main import DPLLSearchEngine
+    from main import (DPLLSearchEngine, ResultCache, formula_cache_key, solve_with_cache,
+                      DratProofWriter, read_drat_proof, check_drat_proof, ClauseMatrix, batch_propagate,
+                      SharedClauseDatabase, SharedClauseRing, InProcessBCPEngine, FormulaIndex,
+                      formula_index_for, LocalSearchSolver, substitute_equivalent_literals,
+                      expand_equivalent_model, CardinalityConstraint, at_most_one, exactly_one,
+                      XorConstraint, detect_xors, xor_to_cnf, read_checkpoint,
+                      MessageChannel, DistributedCoordinator, run_worker, solve_distributed,
+                      find_symmetry_generators, break_symmetries, parse_wcnf, solve_maxsat)
+    import main as solver_module
 except ImportError:
     print("Error: 'main.py' not found. Please ensure test_suite.py is in the same directory.")
     sys.exit(1)
@@ -236,5 +250,687 @@ def run_test_suite():
     if os.path.exists("bcp_output.txt"): os.remove("bcp_output.txt")
     if os.path.exists("bcp_trigger_input.txt"): os.remove("bcp_trigger_input.txt")
 
+# ==========================================
+# FEATURE CHECKS
+# ==========================================
+def check_result_cache():
+    """Same formula in another clause/literal order must hit the cache, also from disk."""
+    clauses = [[-1, 2], [-2, -3], [3, 1], [-2, 3]]
+    shuffled = [[3, -2], [1, 3], [-3, -2], [2, -1]]
+    if formula_cache_key(clauses, 3) != formula_cache_key(shuffled, 3):
+        return False
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResultCache(capacity=1, cache_dir=cache_dir)
+        first = solve_with_cache(cache, clauses, 3, engine_hook=create_mock_engine(clauses))
+        second = solve_with_cache(cache, shuffled, 3, engine_hook=create_mock_engine(shuffled))
+
+        # A fresh cache on the same directory answers from the disk tier
+        reloaded = ResultCache(capacity=1, cache_dir=cache_dir)
+        third = solve_with_cache(reloaded, clauses, 3)
+
+    if not (first["status"] == "SAT" and second == first and third == first
+            and cache.hits == 1 and reloaded.hits == 1):
+        return False
+
+    # A run that asks for a proof must really solve, even when the answer is cached
+    unsat = [[1, 2], [1, -2], [-1, 2], [-1, -2]]
+    cache = ResultCache()
+    solve_with_cache(cache, unsat, 2, engine=InProcessBCPEngine(unsat, 2))
+    with DratProofWriter("cached.drat") as proof:
+        result = solve_with_cache(cache, unsat, 2, engine=InProcessBCPEngine(unsat, 2), proof=proof)
+    if result["status"] != "UNSAT" or not check_drat_proof(unsat, read_drat_proof("cached.drat")):
+        return False
+
+    # Constraints carried by the engine are part of the problem, so they must split the key
+    solve_with_cache(cache, [[1, 2, 3]], 3, engine=InProcessBCPEngine([[1, 2, 3]], 3))
+    none_true = InProcessBCPEngine([[1, 2, 3]], 3, cardinality=[CardinalityConstraint([1, 2, 3], 0)])
+    return solve_with_cache(cache, [[1, 2, 3]], 3, engine=none_true)["status"] == "UNSAT"
+
+
+def check_drat_proof_output():
+    """UNSAT runs must leave a binary DRAT proof that both checker modes accept."""
+    formulas = [
+        [[1], [-1]],
+        [[1, 2], [1, -2], [-1, 2], [-1, -2]],
+        [[1, 2, 3], [-1, 2], [-2, 3], [-3, 1], [-1, -2, -3]],
+    ]
+    for clauses in formulas:
+        num_vars = max(abs(lit) for clause in clauses for lit in clause)
+        with DratProofWriter("proof.drat") as proof:
+            solver = DPLLSearchEngine(clauses, num_vars, proof=proof)
+            solver.execute_inference_engine = create_mock_engine(clauses)
+            result = solver.solve()
+        steps = read_drat_proof("proof.drat")
+        if result["status"] != "UNSAT" or steps[-1] != ("a", []):
+            return False
+        if not (check_drat_proof(clauses, steps, "forward") and check_drat_proof(clauses, steps, "backward")):
+            return False
+
+    # A bogus refutation of a satisfiable formula must be rejected
+    bogus = [("a", [])]
+    return not check_drat_proof([[1, 2]], bogus, "forward") and not check_drat_proof([[1, 2]], bogus, "backward")
+
+
+def check_batch_propagation():
+    """Batched NumPy BCP must agree with the reference mock engine for every trigger literal."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("   (NumPy not installed, skipping)")
+        return True
+
+    formulas = [
+        [[1], [-1, 2], [-2, 3]],
+        [[1, 2], [-1, 3], [-3, 4], [-2, -4], [-1, -2]],
+        [[1, 2], [1, -2], [-1, 2], [-1, -2]],
+        [[-1, 2], [-2, -3], [3, 1], [-2, 3]],
+    ]
+    for clauses in formulas:
+        num_vars = max(abs(lit) for clause in clauses for lit in clause)
+        triggers = [lit for var in range(1, num_vars + 1) for lit in (var, -var)]
+        batch = batch_propagate(ClauseMatrix(clauses), triggers, dl=1)
+
+        solver_module.clauses = clauses
+        solver = DPLLSearchEngine(clauses, num_vars)
+        for lit, res in zip(triggers, batch):
+            solver.write_trigger_input(lit, 1)
+            solver_module.mock_inference_engine_generic()
+            expected = solver.read_bcp_output()
+            if res["status"] != expected["status"]:
+                return False
+            if res["status"] != "CONFLICT" and res["assignments"] != expected["assignments"]:
+                return False
+            # Format 2: the trigger first, then each literal after the ones its reason clause needs
+            if res["format"] != 2 or res["assignments"] != {abs(l): l > 0 for l, _ in res["forced"]}:
+                return False
+            if res["forced"] and res["forced"][0] != (lit, "DECISION"):
+                return False
+            earlier = set()
+            for forced_lit, reason in res["forced"][1:]:
+                clause = clauses[int(reason.split("_")[1]) - 1]
+                if forced_lit not in clause or any(-l not in earlier | {lit} for l in clause if l != forced_lit):
+                    return False
+                earlier.add(forced_lit)
+
+    # Declared variables that no clause uses are valid triggers; undeclared ones are refused
+    res = batch_propagate(ClauseMatrix([[1, 2]], num_vars=4), [3, -4], base_assignments={4: False})
+    if [r["assignments"] for r in res] != [{3: True}, {}]:
+        return False
+    try:
+        batch_propagate(ClauseMatrix([[1, 2]]), [3])
+        return False
+    except ValueError:
+        return True
+
+
+def pigeonhole_clauses(pigeons, holes):
+    """PHP(pigeons, holes): variable (p * holes + h + 1) means pigeon p sits in hole h."""
+    var = lambda p, h: p * holes + h + 1
+    clauses = [[var(p, h) for h in range(holes)] for p in range(pigeons)]
+    for h in range(holes):
+        for p in range(pigeons):
+            for q in range(p + 1, pigeons):
+                clauses.append([-var(p, h), -var(q, h)])
+    return clauses, pigeons * holes
+
+
+def check_lookahead_mode():
+    """Lookahead branching must agree with JW, reuse its probes and keep DRAT proofs valid."""
+    cases = [
+        ([[1], [-1, 2], [-2, 3]], 3, "SAT"),
+        ([[1, 2], [-1, 3], [-3, 4], [-2, -4], [-1, -2]], 4, "SAT"),
+        ([[1, 2], [1, -2], [-1, 2], [-1, -2]], 2, "UNSAT"),
+        ([[-1, 2], [-2, -3], [3, 1], [-2, 3]], 3, "SAT"),
+        pigeonhole_clauses(3, 2) + ("UNSAT",),
+    ]
+    reuses = 0
+    for clauses, num_vars, expected in cases:
+        with DratProofWriter("proof.drat") as proof:
+            solver = DPLLSearchEngine(clauses, num_vars, proof=proof, decision_mode="lookahead", lookahead_k=4)
+            solver.execute_inference_engine = create_mock_engine(clauses)
+            result = solver.solve()
+        if result["status"] != expected:
+            return False
+        if expected == "UNSAT" and not check_drat_proof(clauses, read_drat_proof("proof.drat")):
+            return False
+        reuses += result["stats"]["probe_reuses"]
+    if reuses == 0:
+        return False
+
+    # A literal failed through a learned implication is a conflict like any other
+    clauses = [[-1, 2], [1, 3]]
+    solver = DPLLSearchEngine(clauses, 3, engine=InProcessBCPEngine(clauses, 3), decision_mode="lookahead")
+    conflicts = []
+    solver.conflict_listener = lambda literal, bcp_res: conflicts.append((literal, bcp_res))
+    solver.binary_implications = {1: {2}}
+    solver.assignments = {2: False}
+    var, probes = solver.heuristic_lookahead(0, 1)
+    if var != 1 or conflicts != [(1, probes[1])] or solver.stats["conflicts"] != 1:
+        return False
+    return probes[1]["conflict_clause"] == [-1, 2] and probes[1]["forced"] == [(1, "DECISION")]
+
+
+def _shared_db_worker(clause_db, ring, worker_id):
+    """Worker process: reads the attached clause database and shares a 'learned' clause."""
+    literal_sum = sum(sum(clause) for clause in clause_db)
+    ring.publish([worker_id + 1, literal_sum])
+
+
+def check_shared_clause_database():
+    """Workers attach to the shared clauses by name and exchange clauses through the ring."""
+    clauses = [[-1, 2], [-2, -3], [3, 1], [-2, 3]]
+    clause_db = SharedClauseDatabase.create(clauses)
+    ring = SharedClauseRing.create(multiprocessing.Lock(), capacity=8, max_len=4)
+    try:
+        if [list(c) for c in clause_db] != clauses or len(pickle.dumps(clause_db)) > 200:
+            return False
+
+        workers = [multiprocessing.Process(target=_shared_db_worker, args=(clause_db, ring, i)) for i in range(2)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        if sorted(ring.read_new()) != [[1, 1], [2, 1]]:
+            return False
+
+        # The attached view is read-only and works as the solver's clause list
+        attached = SharedClauseDatabase.attach(clause_db.name)
+        try:
+            attached.literals[0] = 0
+            return False
+        except TypeError:
+            pass
+        solver = DPLLSearchEngine(attached, 3)
+        solver.execute_inference_engine = create_mock_engine(attached)
+        status = solver.solve()["status"]
+        del solver
+        attached.close()
+        return status == "SAT"
+    finally:
+        ring.close()
+        clause_db.close()
+
+
+def check_delta_protocol():
+    """The v2 output reports only the forced literals with reasons; the in-process engine agrees."""
+    clauses = [[1], [-1, 2], [-2, 3]]
+    solver_module.clauses = clauses
+    solver = DPLLSearchEngine(clauses, 3)
+    solver.write_trigger_input(-3, 1)
+    solver_module.mock_inference_engine_generic()
+    from_file = solver.read_bcp_output()
+
+    engine = InProcessBCPEngine(clauses, 3)
+    initial = engine.run(0, 0)
+    if from_file["format"] != 2 or initial["forced"] != [(1, "Clause_1"), (2, "Clause_2"), (3, "Clause_3")]:
+        return False
+    if initial["status"] != "SAT" or from_file["forced"][0] != (-3, "DECISION"):
+        return False
+
+    # The stateful engine backtracks by DL and reports only the delta of each trigger
+    engine = InProcessBCPEngine([[-1, 2], [-2, -3], [3, 1], [-2, 3]], 3)
+    engine.run(0, 0)
+    first = engine.run(2, 1)
+    second = engine.run(-2, 1)
+    return (first["status"] == "CONFLICT" and first["conflict_id"] == "Clause_4"
+            and second["forced"] == [(-2, "DECISION"), (-1, "Clause_1"), (3, "Clause_3")]
+            and second["status"] == "SAT")
+
+
+def check_in_process_engine():
+    """The in-process engine solves the suite formulas and refutes PHP(4,3) with a valid proof."""
+    cases = [
+        ([[1], [-1]], 1, "UNSAT"),
+        ([[1], [-1, 2], [-2, 3]], 3, "SAT"),
+        ([[1, 2], [-1, 3], [-3, 4], [-2, -4], [-1, -2]], 4, "SAT"),
+        ([[1, 2], [1, -2], [-1, 2], [-1, -2]], 2, "UNSAT"),
+        ([[-1, 2], [-2, -3], [3, 1], [-2, 3]], 3, "SAT"),
+        pigeonhole_clauses(4, 3) + ("UNSAT",),
+    ]
+    for clauses, num_vars, expected in cases:
+        for mode in ("jw", "lookahead"):
+            with DratProofWriter("proof.drat") as proof:
+                solver = DPLLSearchEngine(clauses, num_vars, proof=proof, decision_mode=mode,
+                                          engine=InProcessBCPEngine(clauses, num_vars))
+                result = solver.solve()
+            if result["status"] != expected:
+                return False
+            if expected == "SAT" and not all(any(result["model"].get(abs(l)) == (l > 0) for l in c) for c in clauses):
+                return False
+            if expected == "UNSAT" and not check_drat_proof(clauses, read_drat_proof("proof.drat")):
+                return False
+    return True
+
+
+def check_formula_index():
+    """The index holds the per-formula data and is built once per clause list."""
+    clauses = [[1, -2], [2, 3, -4], [-1], [4, 2]]
+    index = FormulaIndex(clauses, 5)
+    if (index.max_var, index.num_vars, index.variables) != (4, 5, (1, 2, 3, 4, 5)):
+        return False
+    if index.binary_clauses != [0, 3] or index.clause_lengths != [2, 3, 1, 2]:
+        return False
+    # Occurrence lists are only built for consumers that walk them (local search)
+    if index._occurrences is not None:
+        return False
+    if index.pos_occurrences[2] != [1, 3] or index.neg_occurrences[2] != [0]:
+        return False
+    solver = LocalSearchSolver(clauses, 5, index=index)
+    if solver.pos_occurrences is not index.pos_occurrences:
+        return False
+    if index.jw_weights[2] != 0.25 + 0.125 + 0.25 or index.jw_weights[5] != 0.0:
+        return False
+    return formula_index_for(clauses) is formula_index_for(clauses)
+
+
+def random_3sat(num_vars, num_clauses, seed):
+    rng = random.Random(seed)
+    return [[v if rng.random() < 0.5 else -v for v in rng.sample(range(1, num_vars + 1), 3)]
+            for _ in range(num_clauses)]
+
+
+def check_local_search():
+    """Incremental break/make counts stay exact; SAT instances are solved, hybrid stays complete."""
+    clauses = random_3sat(60, 220, seed=7)
+    ls = LocalSearchSolver(clauses, 60, seed=1)
+    ls.initialize()
+    for var in random.Random(2).choices(range(1, 61), k=300):
+        ls.flip(var)
+    for var in range(1, 61):
+        breaks = sum(1 for c in ls.clauses
+                     if [abs(l) for l in c if ls.values[abs(l)] == (l > 0)] == [var])
+        makes = sum(1 for ci in ls.unsat if any(abs(l) == var for l in ls.clauses[ci]))
+        if ls.break_count[var] != breaks or ls.make_count[var] != makes:
+            return False
+
+    for algorithm in ("probsat", "walksat"):
+        result = LocalSearchSolver(clauses, 60, seed=3, algorithm=algorithm).run(max_flips=200000)
+        if result["status"] != "SAT" or not all(any(result["model"][abs(l)] == (l > 0) for l in c) for c in clauses):
+            return False
+
+    solver = DPLLSearchEngine(clauses, 60, engine=InProcessBCPEngine(clauses, 60))
+    if solver.solve(mode="local_search", seed=5)["status"] != "SAT":
+        return False
+
+    # Hybrid mode falls back to DPLL (seeded phases) when local search gives up
+    php, num_vars = pigeonhole_clauses(4, 3)
+    solver = DPLLSearchEngine(php, num_vars, engine=InProcessBCPEngine(php, num_vars))
+    if solver.solve(mode="hybrid", seed=5, max_flips=2000)["status"] != "UNSAT":
+        return False
+
+    # An empty clause ends local search at once instead of flipping inside it
+    if DPLLSearchEngine([[]], 1, engine=InProcessBCPEngine([[]], 1)).solve(mode="local_search")["status"] != "UNKNOWN":
+        return False
+    solver = DPLLSearchEngine([[1], []], 1, engine=InProcessBCPEngine([[1], []], 1))
+    return solver.solve(mode="hybrid")["status"] == "UNSAT"
+
+
+def check_binary_implications():
+    """Binary clauses propagate through implication lists; SCC substitution keeps models valid."""
+    clauses = [[-1, 2], [-2, 3], [-3, 1], [1, 4, 5], [-4, -2], [3, 5]]
+    engine = InProcessBCPEngine(clauses, 5)
+    if any(engine.watches[lit] for lit in (-1, 2, -2, 3, -3, 5)) or engine.implications[1] != [(2, 0)]:
+        return False
+    engine.run(0, 0)
+    if engine.run(1, 1)["forced"] != [(1, "DECISION"), (2, "Clause_1"), (3, "Clause_2"), (-4, "Clause_5")]:
+        return False
+
+    # 1, 2 and 3 form one SCC and collapse onto variable 1
+    reduced, representatives = substitute_equivalent_literals(clauses, 5)
+    if representatives != {2: 1, 3: 1} or [-4, -1] not in reduced:
+        return False
+    solver = DPLLSearchEngine(reduced, 5, engine=InProcessBCPEngine(reduced, 5))
+    model = expand_equivalent_model(solver.solve()["model"], representatives)
+    if not all(any(model[abs(l)] == (l > 0) for l in c) for c in clauses):
+        return False
+
+    # x equivalent to -x: the substitution reports UNSAT via the empty clause
+    return substitute_equivalent_literals([[1, 2], [-1, -2], [1, -2], [-1, 2]], 2)[0] == [[]]
+
+
+def check_cardinality_constraints():
+    """Native at-most-k constraints propagate by counter and explain their conflicts."""
+    engine = InProcessBCPEngine([], 4, cardinality=[at_most_one([1, 2, 3]), CardinalityConstraint([2, 3, 4], 2)])
+    engine.run(0, 0)
+    if engine.run(1, 1)["forced"] != [(1, "DECISION"), (-2, "Card_1"), (-3, "Card_1")]:
+        return False
+    if engine.explain(engine.reasons[3], -3) != [-1, -3]:
+        return False
+    engine.run(2, 1)
+    conflict = engine.run(3, 2)
+    if conflict["status"] != "CONFLICT" or conflict["conflict_id"] != "Card_1" or conflict["conflict_clause"] != [-2, -3]:
+        return False
+
+    # Pigeonhole with native at-most-one per hole: 5 clauses + 4 constraints instead of 45 clauses
+    pigeons, holes = 5, 4
+    var = lambda p, h: p * holes + h + 1
+    clauses, cards = [], []
+    for p in range(pigeons):
+        clauses.append([var(p, h) for h in range(holes)])
+    for h in range(holes):
+        cards.append(at_most_one([var(p, h) for p in range(pigeons)]))
+    solver = DPLLSearchEngine(clauses, pigeons * holes,
+                              engine=InProcessBCPEngine(clauses, pigeons * holes, cardinality=cards))
+    if solver.solve()["status"] != "UNSAT":
+        return False
+
+    # Exactly-one per pigeon with one pigeon fewer is SAT, and the model respects every constraint
+    clauses, cards = [], []
+    for p in range(holes):
+        clause, card = exactly_one([var(p, h) for h in range(holes)])
+        clauses.append(clause)
+        cards.append(card)
+    for h in range(holes):
+        cards.append(at_most_one([var(p, h) for p in range(holes)]))
+    solver = DPLLSearchEngine(clauses, holes * holes,
+                              engine=InProcessBCPEngine(clauses, holes * holes, cardinality=cards))
+    result = solver.solve()
+    if result["status"] != "SAT" or not all(card.is_satisfied(result["model"]) for card in cards):
+        return False
+
+    # Local search only walks the CNF, so its models are checked against the constraints
+    for mode, expected in (("local_search", "UNKNOWN"), ("hybrid", "UNSAT")):
+        engine = InProcessBCPEngine([[1, 2, 3]], 3, cardinality=[CardinalityConstraint([1, 2, 3], 0)])
+        if DPLLSearchEngine([[1, 2, 3]], 3, engine=engine).solve(mode=mode, seed=1)["status"] != expected:
+            return False
+    return True
+
+
+def check_xor_constraints():
+    """XORs recovered from CNF are solved by Gaussian elimination, with explaining clauses."""
+    # x1^x2 = 1, x2^x3 = 1, x1^x3 = 1 sums to 0 = 1: refuted by elimination alone
+    cnf = [cl for xor in (XorConstraint([1, 2], 1), XorConstraint([2, 3], 1), XorConstraint([1, 3], 1))
+           for cl in xor_to_cnf(xor)]
+    xors, remaining = detect_xors(cnf, min_size=2)
+    if len(xors) != 3 or remaining:
+        return False
+    solver = DPLLSearchEngine(remaining, 3, engine=InProcessBCPEngine(remaining, 3, xors=xors))
+    result = solver.solve()
+    if result["status"] != "UNSAT" or result["stats"]["decisions"] != 0:
+        return False
+
+    engine = InProcessBCPEngine([], 3, xors=[XorConstraint([1, 2, 3], 1)])
+    engine.run(0, 0)
+    engine.run(1, 1)
+    forced = engine.run(2, 2)["forced"]
+    if forced != [(2, "DECISION"), (3, "Xor_1")] or engine.explain(engine.reasons[3]) != [-1, -2, 3]:
+        return False
+
+    # Random parity system over 60 variables: 55 XORs of length 5 as CNF (880 clauses)
+    rng = random.Random(11)
+    system = [XorConstraint(rng.sample(range(1, 61), 5), rng.random() < 0.5) for _ in range(55)]
+    cnf = [cl for xor in system for cl in xor_to_cnf(xor)]
+    xors, remaining = detect_xors(cnf)
+    if len(xors) != len(system) or remaining:
+        return False
+    solver = DPLLSearchEngine(remaining, 60, engine=InProcessBCPEngine(remaining, 60, xors=xors))
+    result = solver.solve()
+    if result["status"] != "SAT" or not all(xor.is_satisfied(result["model"]) for xor in system):
+        return False
+
+    # Local search only walks the CNF, so its models are checked against the XOR rows
+    for mode, expected in (("local_search", "UNKNOWN"), ("hybrid", "UNSAT")):
+        engine = InProcessBCPEngine([], 2, xors=[XorConstraint([1, 2], 1), XorConstraint([1, 2], 0)])
+        if DPLLSearchEngine([], 2, engine=engine).solve(mode=mode, seed=1)["status"] != expected:
+            return False
+    return True
+
+
+class _Preempted(Exception):
+    pass
+
+
+def _interrupt_after(solver, propagations):
+    """Makes the solver's engine 'crash' after a number of propagations, like a preempted node."""
+    run = solver.engine.run
+    def limited_run(literal, dl):
+        if solver.stats["propagations"] >= propagations:
+            raise _Preempted()
+        return run(literal, dl)
+    solver.engine.run = limited_run
+
+
+def check_checkpoint_resume():
+    """A search interrupted mid-way resumes from its checkpoint and reaches the same answer."""
+    cases = [pigeonhole_clauses(5, 4) + ("UNSAT",), (random_3sat(40, 160, seed=3), 40, "SAT")]
+    for clauses, num_vars, expected in cases:
+        solver = DPLLSearchEngine(clauses, num_vars, engine=InProcessBCPEngine(clauses, num_vars),
+                                  checkpoint_path="search.ckpt", checkpoint_interval=0.0)
+        _interrupt_after(solver, 25)
+        try:
+            solver.solve()
+            return False
+        except _Preempted:
+            pass
+
+        snapshot = read_checkpoint("search.ckpt")
+        if not snapshot["frames"] or snapshot["stats"]["propagations"] > 25:
+            return False
+
+        resumed = DPLLSearchEngine(clauses, num_vars, engine=InProcessBCPEngine(clauses, num_vars))
+        result = resumed.resume("search.ckpt")
+        if result["status"] != expected:
+            return False
+        if expected == "SAT" and not all(any(result["model"].get(abs(l)) == (l > 0) for l in c) for c in clauses):
+            return False
+
+    # The assumptions of the interrupted solve() are part of the checkpoint and hold again after resume
+    clauses, num_vars = random_3sat(40, 160, seed=3), 40
+    model = DPLLSearchEngine(clauses, num_vars, engine=InProcessBCPEngine(clauses, num_vars)).solve()["model"]
+    assumptions = [-var if model[var] else var for var in (1, 2)]
+    expected = DPLLSearchEngine(clauses, num_vars, engine=InProcessBCPEngine(clauses, num_vars)).solve(
+        assumptions=assumptions)["status"]
+    solver = DPLLSearchEngine(clauses, num_vars, engine=InProcessBCPEngine(clauses, num_vars),
+                              checkpoint_path="search.ckpt", checkpoint_interval=0.0)
+    _interrupt_after(solver, 25)
+    try:
+        solver.solve(assumptions=assumptions)
+        return False
+    except _Preempted:
+        pass
+    if read_checkpoint("search.ckpt")["assumptions"] != assumptions:
+        return False
+    result = DPLLSearchEngine(clauses, num_vars, engine=InProcessBCPEngine(clauses, num_vars)).resume("search.ckpt")
+    if result["status"] != expected:
+        return False
+    if expected == "SAT" and any(result["model"][abs(lit)] != (lit > 0) for lit in assumptions):
+        return False
+
+    # A checkpoint of another formula is refused
+    try:
+        DPLLSearchEngine([[1, 2]], 2).resume("search.ckpt")
+        return False
+    except ValueError:
+        return True
+
+
+def _crashing_worker(host, port):
+    """Worker that takes a cube and dies without answering."""
+    channel = MessageChannel(socket.create_connection((host, port)))
+    channel.send({"type": "hello"})
+    while channel.receive()["type"] != "cube":
+        pass
+    os._exit(1)
+
+
+def _lying_worker(host, port):
+    """Worker that answers its first cube with a model that does not satisfy the formula."""
+    channel = MessageChannel(socket.create_connection((host, port)))
+    channel.send({"type": "hello"})
+    message = channel.receive()
+    while message["type"] != "cube":
+        message = channel.receive()
+    channel.send({"type": "result", "cube": message["cube"], "status": "SAT", "model": [1]})
+    channel.sock.close()
+
+
+def _late_worker(host, port):
+    time.sleep(0.3)
+    run_worker(host, port)
+
+
+def check_distributed_search():
+    """Local workers over TCP agree with the sequential answer, also when a worker crashes."""
+    # A cube is checked in full even when propagation settles the formula before or during it
+    for clauses, num_vars, cube in (([[1]], 1, [-1]), ([[1, 2]], 2, [1, 2, -1])):
+        if DPLLSearchEngine(clauses, num_vars, engine=InProcessBCPEngine(clauses, num_vars)).solve(
+                assumptions=cube)["status"] != "UNSAT":
+            return False
+
+    clauses, num_vars = pigeonhole_clauses(6, 5)
+    result = solve_distributed(clauses, num_vars, workers=3, timeout=120)
+    if result["status"] != "UNSAT" or result["stats"]["refuted"] != result["stats"]["cubes"]:
+        return False
+
+    clauses = random_3sat(60, 220, seed=1)
+    result = solve_distributed(clauses, 60, workers=3, timeout=120)
+    if result["status"] != "SAT" or not all(any(result["model"].get(abs(l)) == (l > 0) for l in c) for c in clauses):
+        return False
+
+    # Shared lemmas keep only the decisions a conflict depends on: a cube literal on a variable
+    # that occurs in no clause never shows up in them, whereas a negated decision path would carry it
+    clauses, num_vars = pigeonhole_clauses(5, 4)
+    server = socket.create_server(("127.0.0.1", 0))
+    worker = multiprocessing.Process(target=run_worker, args=server.getsockname()[:2])
+    worker.start()
+    conn, _ = server.accept()
+    channel = MessageChannel(conn)
+    channel.receive()  # hello
+    channel.send({"type": "formula", "clauses": clauses, "num_vars": num_vars + 1})
+    channel.send({"type": "cube", "cube": 0, "literals": [num_vars + 1, 1]})
+    learned = []
+    message = channel.receive()
+    while message["type"] != "result":
+        learned += message["clauses"]
+        message = channel.receive()
+    channel.send({"type": "stop"})
+    conn.close()
+    server.close()
+    worker.join(timeout=5)
+    if message["status"] != "UNSAT" or not learned:
+        return False
+    if any(len(lemma) > 3 or -(num_vars + 1) in lemma for lemma in learned):
+        return False
+
+    # The crashed worker's cube and the cube answered with a bogus model go back to the queue
+    clauses, num_vars = pigeonhole_clauses(5, 4)
+    coordinator = DistributedCoordinator(clauses, num_vars, split_depth=2)
+    host, port = coordinator.address
+    processes = [multiprocessing.Process(target=_crashing_worker, args=(host, port)),
+                 multiprocessing.Process(target=_lying_worker, args=(host, port))]
+    processes += [multiprocessing.Process(target=_late_worker, args=(host, port)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    result = coordinator.run(timeout=120)
+    for process in processes:
+        process.join(timeout=5)
+    return (result["status"] == "UNSAT" and result["stats"]["requeued"] >= 1
+            and result["stats"]["invalid_models"] == 1)
+
+
+def check_symmetry_breaking():
+    """Pigeonhole symmetries are detected and the lex-leader clauses shrink the search."""
+    clauses, num_vars = pigeonhole_clauses(6, 5)
+    generators = find_symmetry_generators(clauses, num_vars)
+    clause_set = {frozenset(c) for c in clauses}
+    def image(lit, generator):
+        mapped = generator.get(abs(lit), abs(lit))
+        return mapped if lit > 0 else -mapped
+    if len(generators) != 9:  # 5 pigeon swaps + 4 hole swaps
+        return False
+    if any({frozenset(image(l, g) for l in c) for c in clause_set} != clause_set for g in generators):
+        return False
+
+    broken, total_vars = break_symmetries(clauses, num_vars)
+    plain = DPLLSearchEngine(clauses, num_vars, engine=InProcessBCPEngine(clauses, num_vars)).solve()
+    result = DPLLSearchEngine(broken, total_vars, engine=InProcessBCPEngine(broken, total_vars)).solve()
+    if result["status"] != "UNSAT" or result["stats"]["decisions"] * 10 > plain["stats"]["decisions"]:
+        return False
+
+    # Satisfiable instances stay satisfiable, and a tiny budget still gives valid generators
+    clauses, num_vars = pigeonhole_clauses(4, 4)
+    broken, total_vars = break_symmetries(clauses, num_vars)
+    result = DPLLSearchEngine(broken, total_vars, engine=InProcessBCPEngine(broken, total_vars)).solve()
+    if result["status"] != "SAT" or not all(any(result["model"][abs(l)] == (l > 0) for l in c) for c in clauses):
+        return False
+    return len(find_symmetry_generators(clauses, num_vars, max_nodes=3)) < len(find_symmetry_generators(clauses, num_vars))
+
+
+def check_maxsat():
+    """Core-guided MaxSAT reaches the brute-force optimum with monotone anytime bounds."""
+    classic = "c example\np wcnf 4 8 100\n100 1 2 0\n100 -1 -2 0\n100 3 4 0\n5 -1 0\n3 -2 0\n4 -3 0\n2 -4 0\n1 1 3 0\n"
+    hard, soft, num_vars = parse_wcnf(classic)
+    new_style = "h 1 2 0\nh -1 -2 0\nh 3 4 0\n5 -1 0\n3 -2 0\n4 -3 0\n2 -4 0\n1 1 3 0\n"
+    if parse_wcnf(new_style) != (hard, soft, num_vars) or len(hard) != 3 or soft[0] != (5, [-1]):
+        return False
+    result = solve_maxsat(hard, soft, num_vars)
+    if result["status"] != "OPTIMUM" or result["cost"] != 6 or result["lower_bound"] != 6:
+        return False
+
+    rng = random.Random(11)
+    hard = random_3sat(12, 30, seed=4)
+    soft = [(rng.randint(1, 6), [rng.choice([-1, 1]) * rng.randint(1, 12) for _ in range(2)]) for _ in range(20)]
+    best = None
+    for bits in range(1 << 12):
+        value = lambda lit: ((bits >> (abs(lit) - 1)) & 1) == (lit > 0)
+        if all(any(value(l) for l in c) for c in hard):
+            cost = sum(w for w, c in soft if not any(value(l) for l in c))
+            best = cost if best is None or cost < best else best
+    result = solve_maxsat(hard, soft, 12)
+    model = result["model"]
+    if result["status"] != "OPTIMUM" or result["cost"] != best:
+        return False
+    if not all(any(model[abs(l)] == (l > 0) for l in c) for c in hard):
+        return False
+    lowers = [low for low, _ in result["bounds"]]
+    uppers = [up for _, up in result["bounds"] if up is not None]
+    if lowers != sorted(lowers) or uppers != sorted(uppers, reverse=True):
+        return False
+
+    # Unsatisfiable hard clauses
+    return solve_maxsat([[1], [-1]], [(1, [2])], 2)["status"] == "UNSAT"
+
+
+def run_feature_checks():
+    checks = [
+        ("Result cache (LRU + disk)", check_result_cache),
+        ("DRAT proof for UNSAT", check_drat_proof_output),
+        ("Batched NumPy BCP", check_batch_propagation),
+        ("Lookahead branching", check_lookahead_mode),
+        ("Shared-memory clause database", check_shared_clause_database),
+        ("Delta-encoded BCP protocol (v2)", check_delta_protocol),
+        ("In-process BCP engine", check_in_process_engine),
+        ("Formula index", check_formula_index),
+        ("Local search (probSAT / WalkSAT)", check_local_search),
+        ("Binary implication fast path", check_binary_implications),
+        ("Native cardinality constraints", check_cardinality_constraints),
+        ("XOR constraints (Gaussian elimination)", check_xor_constraints),
+        ("Checkpoint and resume", check_checkpoint_resume),
+        ("Distributed search (TCP coordinator)", check_distributed_search),
+        ("Symmetry breaking (lex-leader)", check_symmetry_breaking),
+        ("Core-guided weighted MaxSAT", check_maxsat),
+    ]
+
+    print("\n" + "="*60)
+    print("FEATURE CHECKS")
+    print("="*60)
+
+    # Run inside a scratch folder so the I/O files and master trace of the
+    # checks do not overwrite the artifacts of the main suite
+    original_dir = os.getcwd()
+    passed_count = 0
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        os.chdir(scratch_dir)
+        try:
+            for name, check in checks:
+                ok = check()
+                print(f"{name}: {'[PASSED]' if ok else '[FAILED]'}")
+                passed_count += int(ok)
+        finally:
+            os.chdir(original_dir)
+    print(f"FEATURE SUMMARY: {passed_count}/{len(checks)} Checks Passed")
+
 if __name__ == "__main__":
-    run_test_suite()
\ No newline at end of file
+    run_test_suite()
+    run_feature_checks()
\ No newline at end of file